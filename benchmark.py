@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from classes.MDP import PRECISIONS, SOLVERS
+from helper.MazeLayouts import generate_random_array_maze
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Name of the parameter swept for each algorithm, the others are solved with their defaults
+SWEPT_PARAMETERS = {
+    "value_iteration": "error",
+    "policy_iteration": None,
+    "modified_policy_iteration": "k",
+    "prioritized_sweeping": "error",
+}
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Modules that importing the solvers must not load, see check_import
+PLOTTING_MODULES = ("tkinter", "matplotlib")
+
+def import_solvers():
+    """
+    Imports the solvers in a fresh interpreter
+
+    Returns:
+        Tuple[float, List[str]]: The time taken and the plotting modules loaded by the import
+    """
+    code = (
+        "import sys, time; start = time.perf_counter(); import classes.MDP; print(time.perf_counter() - start); "
+        f"print(*[name for name in {PLOTTING_MODULES!r} if name in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    import_time, modules = result.stdout.split("\n")[:2]
+    return float(import_time), modules.split()
+
+def get_import_time():
+    """
+    Measures the time taken to import the solvers in a fresh interpreter
+    """
+    return import_solvers()[0]
+
+def check_import(budget:float, repeats:int=5):
+    """
+    Checks that importing the solvers stays within a time budget and loads no plotting modules.
+    The fastest of the repeats is compared to the budget, to filter out noise from other processes.
+
+    Args:
+        budget (float): The maximum import time in seconds
+        repeats (int): The number of imports to time
+
+    Returns:
+        List[str]: The failed checks, empty if the import is within budget
+    """
+    imports = [import_solvers() for _ in range(repeats)]
+    import_time = min(import_time for import_time, _ in imports)
+    modules = sorted({module for _, modules in imports for module in modules})
+    failures = []
+    if import_time > budget:
+        failures.append(f"Importing the solvers took {import_time:.3f}s, over the budget of {budget:.3f}s")
+    if modules:
+        failures.append(f"Importing the solvers loaded plotting modules: {', '.join(modules)}")
+    return failures
+
+def run_solve(algorithm:str, maze, discount:float, params:dict, track_memory:bool, profile:bool=False, precision:str="float64"):
+    """
+    Solves a maze once, silencing the solver's output
+
+    Returns:
+        dict: The time, iterations, backups, peak memory (if tracked) and phase times (if profiled) of the solve
+    """
+    if track_memory:
+        tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        solver = SOLVERS[algorithm](maze, discount=discount, stats=profile, precision=precision)
+        iterations = solver.solve(**params)
+        total_time = time.perf_counter() - start_time
+    peak_memory = None
+    if track_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    result = {"time": total_time, "iterations": iterations, "backups": solver.backups, "peak_memory": peak_memory}
+    if profile:
+        result["phase_times"] = solver.stats.phase_times
+    return result
+
+def get_cases(args):
+    """
+    Yields every combination of maze and solver parameters to benchmark
+    """
+    for size, wall_density, terminal_density, discount, precision in itertools.product(
+        args.sizes, args.wall_densities, args.terminal_densities, args.discounts, args.precisions
+    ):
+        for algorithm in args.algorithms:
+            name = SWEPT_PARAMETERS[algorithm]
+            values = {"error": args.errors, "k": args.ks, None: [None]}[name]
+            for value in values:
+                params = {} if name is None else {name: value}
+                yield {
+                    "algorithm": algorithm,
+                    "size": size,
+                    "wall_density": wall_density,
+                    "terminal_density": terminal_density,
+                    "discount": discount,
+                    "precision": precision,
+                    "params": params,
+                }
+
+def run_benchmark(args):
+    results = []
+    for case in get_cases(args):
+        for trial in range(args.warmup + args.trials):
+            # Every trial solves a different maze, but the mazes are the same for every algorithm and run
+            seed = args.seed + trial
+            maze = generate_random_array_maze(
+                (case["size"], case["size"]), case["wall_density"], case["terminal_density"], seed=seed
+            )
+            result = run_solve(case["algorithm"], maze, case["discount"], case["params"], args.memory, args.profile, case["precision"])
+            if trial < args.warmup:
+                continue
+            results.append({**case, "trial": trial - args.warmup, "seed": seed, **result})
+            print(
+                f"{case['algorithm']:>26} size={case['size']:<5} discount={case['discount']:<6} {case['params']} "
+                f"trial={trial - args.warmup} time={result['time']:.4f}s iterations={result['iterations']}",
+                file=sys.stderr,
+            )
+    return results
+
+def write_results(path:str, results:list, metadata:dict):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()) if results else [])
+            writer.writeheader()
+            for result in results:
+                writer.writerow({
+                    **result,
+                    **{key: json.dumps(result[key]) for key in ("params", "phase_times") if key in result},
+                })
+        with open(f"{path[:-len('.csv')]}.meta.json", "w") as f:
+            json.dump(metadata, f, indent=2)
+    else:
+        with open(path, "w") as f:
+            json.dump({"metadata": metadata, "results": results}, f, indent=2)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the MDP solvers on seeded random mazes.")
+    parser.add_argument("--algorithms", nargs="+", default=["value_iteration", "policy_iteration", "modified_policy_iteration"],
+                        choices=list(SOLVERS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 50, 100])
+    parser.add_argument("--wall-densities", nargs="+", type=float, default=[0.1])
+    parser.add_argument("--terminal-densities", nargs="+", type=float, default=[0.2])
+    parser.add_argument("--discounts", nargs="+", type=float, default=[0.99])
+    parser.add_argument("--precisions", nargs="+", default=["float64"], choices=list(PRECISIONS))
+    parser.add_argument("--errors", nargs="+", type=float, default=[1e-4], help="Value iteration error thresholds")
+    parser.add_argument("--ks", nargs="+", type=int, default=[50], help="Modified policy iteration evaluation sweeps")
+    parser.add_argument("--trials", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed solves before the trials of each case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="Track peak memory with tracemalloc (slows down the solves)")
+    parser.add_argument("--profile", action="store_true", help="Record the time spent in each phase of the solves")
+    parser.add_argument("--output", default="benchmark.json", help="Output file, .json or .csv")
+    parser.add_argument("--max-import-time", type=float, default=None,
+                        help="Fail without benchmarking if importing the solvers takes longer than this (seconds) or loads plotting modules")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.max_import_time is not None:
+        failures = check_import(args.max_import_time)
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        if failures:
+            sys.exit(1)
+    metadata = {
+        "commit": get_git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "import_time": get_import_time(),
+        "arguments": vars(args),
+    }
+    results = run_benchmark(args)
+    write_results(args.output, results, metadata)
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
@@ -0,0 +1,208 @@
+from typing import List, Union
+import numpy as np
+from classes.States import State
+from classes.Maze import Maze
+from classes.Direction import Direction
+from classes.Transitions import blocked_moves, neighbour_utilities, expected_utilities
+
+
+class BatchedMDP:
+    """
+    Solves many mazes of the same size at once. The mazes are stacked into (mazes, height, width)
+    arrays and every Bellman update is made for all of them in the same NumPy operations, which
+    amortizes the per-maze Python overhead that dominates the solves of small mazes.
+
+    Every maze converges on its own: once a maze has converged it is left out of the following
+    updates, and its utilities, policy and iteration count are those it would get from the
+    corresponding single-maze solver.
+    """
+    def __init__(self, layouts:List[Union[List[List[State]], Maze]], discount:float, absorbing:bool=False):
+        """
+        Args:
+            layouts (List[Union[List[List[State]], Maze]]): The maze layouts, all of the same size
+            discount (float): The discount factor
+            absorbing (bool): Whether the terminal states are absorbing, see MDP
+        """
+        self.mazes = [Maze.from_layout(layout) for layout in layouts]
+        if not self.mazes:
+            raise ValueError("Expected at least one maze.")
+        shapes = {maze.shape for maze in self.mazes}
+        if len(shapes) > 1:
+            raise ValueError(f"Expected mazes of the same size, got sizes {sorted(shapes)}.")
+        self.n_mazes = len(self.mazes)
+        self.height, self.width = self.mazes[0].shape
+        self.discount = discount
+        self.absorbing = absorbing
+
+        self.rewards = np.stack([maze.rewards for maze in self.mazes])
+        self.walls = np.stack([maze.walls for maze in self.mazes]).view(bool)
+        self.terminals = np.stack([maze.terminals for maze in self.mazes]).view(bool)
+        # Blocked moves of every maze, of shape (4, mazes, height, width)
+        self.blocked = blocked_moves(np.pad(self.walls, ((0, 0), (1, 1), (1, 1)), constant_values=True))
+
+        # Walls are fixed at 0 and absorbing terminal states at their reward
+        self._fixed = self.walls | self.terminals if absorbing else self.walls
+        self._fixed_utilities = np.where(self._fixed & ~self.walls, self.rewards, 0.0)
+        self._live_counts = np.count_nonzero(~self._fixed, axis=(1, 2))
+
+        # Action code of every state of every maze, see Direction.ACTIONS
+        self.policy = np.full(self.rewards.shape, Direction.LEFT.index, dtype=np.int8)
+        self.utilities = self._fixed_utilities.copy()
+
+        # Number of iterations of every maze and of single state backups of all mazes performed so far
+        self.iterations = np.zeros(self.n_mazes, dtype=int)
+        self.backups = 0
+
+    def _select(self, indices:np.ndarray):
+        """
+        Returns the index of the given mazes into the stacked arrays, a plain slice if all mazes are
+        given so that the arrays are viewed instead of copied
+        """
+        return slice(None) if len(indices) == self.n_mazes else indices
+
+    def _get_expected_utilities(self, indices:np.ndarray):
+        """
+        Calculates ∑P(s'|s,a)U(s') for every state and action of the given mazes
+
+        Returns:
+            np.ndarray: The expected utilities, of shape (4, len(indices), height, width) indexed by action code
+        """
+        mazes = self._select(indices)
+        return expected_utilities(neighbour_utilities(self.utilities[mazes], self.blocked[:, mazes]))
+
+    def _sweep(self, indices:np.ndarray, actions:np.ndarray=None):
+        """
+        Performs one synchronous Bellman update of the given mazes
+
+        Args:
+            indices (np.ndarray): The indices of the mazes to update
+            actions (np.ndarray): The action code of every state of the mazes for policy evaluation,
+                or None to back up with the best action
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The maximum change of utility of every maze and the expected
+                utilities of the previous utilities
+        """
+        mazes = self._select(indices)
+        previous = self.utilities[mazes]
+        expected = expected_utilities(neighbour_utilities(previous, self.blocked[:, mazes]))
+        if actions is None:
+            utilities = expected.max(axis=0)
+        else:
+            utilities = np.take_along_axis(expected, actions[None].astype(np.intp), axis=0)[0]
+        utilities *= self.discount
+        utilities += self.rewards[mazes]
+        np.copyto(utilities, self._fixed_utilities[mazes], where=self._fixed[mazes])
+        delta = np.abs(utilities - previous).max(axis=(1, 2), initial=0.0)
+        self.utilities[mazes] = utilities
+        self.backups += int(self._live_counts[mazes].sum())
+        return delta, expected
+
+    def get_results(self):
+        """
+        Returns:
+            List[Dict]: The "utilities", "policy" (action codes) and "iterations" of every maze
+        """
+        return [
+            {"utilities": utilities, "policy": policy, "iterations": int(iterations)}
+            for utilities, policy, iterations in zip(self.utilities, self.policy, self.iterations)
+        ]
+
+
+class BatchedValueIteration(BatchedMDP):
+    def solve(self, error:float):
+        """
+        Finds the optimum policy and estimated utilities of every maze
+
+        Args:
+            error (float): The threshold to terminate the value iteration algorithm of every maze
+
+        Returns:
+            np.ndarray: The number of iterations of every maze
+        """
+        theta = error * (1 - self.discount) / self.discount
+        converged = np.zeros(self.n_mazes, dtype=bool)
+
+        while not converged.all():
+            indices = np.flatnonzero(~converged)
+            self.iterations[indices] += 1
+            delta, expected = self._sweep(indices)
+
+            # If delta < theta, the maze has converged. Its policy is the best action of the last
+            # update, which was made from the previous utilities
+            done = delta < theta
+            self.policy[indices[done]] = np.argmax(expected[:, done], axis=0)
+            converged[indices[done]] = True
+
+        print(f"Batched Value Iteration took {self.iterations.min()} to {self.iterations.max()} iterations "
+              f"({self.backups} backups) to converge {self.n_mazes} mazes")
+        return self.iterations
+
+
+class BatchedModifiedPolicyIteration(BatchedMDP):
+    def _policy_evaluation(self, indices:np.ndarray, k:int, tolerance:float=None):
+        """
+        Evaluates the policies of the given mazes approximately by k Bellman updates
+
+        Args:
+            indices (np.ndarray): The indices of the mazes to evaluate
+            k (int): The number of iterations of Bellman update
+            tolerance (float): Stop the evaluation of a maze before k sweeps once a sweep changes
+                none of its utilities by more than this
+        """
+        for _ in range(k):
+            if len(indices) == 0:
+                break
+            delta, _ = self._sweep(indices, self.policy[self._select(indices)])
+            if tolerance is not None:
+                indices = indices[delta >= tolerance]
+
+    def solve(self, k:int, error:float=None, tolerance:float=None):
+        """
+        Finds the optimum policy and estimated utilities of every maze
+
+        Args:
+            k (int): The number of iterations of Bellman update for policy evaluation
+            error (float): If given, terminate every maze once its utilities are within this error of
+                the optimum utilities instead of once its policy stops changing, see ModifiedPolicyIteration
+            tolerance (float): Stop each policy evaluation early once a sweep changes no utility by
+                more than this. Defaults to the termination threshold if an error is given.
+
+        Returns:
+            np.ndarray: The number of iterations of every maze
+        """
+        theta = None if error is None else error * (1 - self.discount) / self.discount
+        if tolerance is None:
+            tolerance = theta
+        converged = np.zeros(self.n_mazes, dtype=bool)
+
+        while not converged.all():
+            indices = np.flatnonzero(~converged)
+            self.iterations[indices] += 1
+            self._policy_evaluation(indices, k, tolerance)
+
+            # If the best action of any state is different from its current action, the policy changes
+            mazes = self._select(indices)
+            expected = self._get_expected_utilities(indices)
+            best_actions = np.argmax(expected, axis=0)
+            policy = self.policy[mazes]
+            changed = (best_actions != policy) & ~self._fixed[mazes]
+            policy[changed] = best_actions[changed]
+            self.policy[mazes] = policy
+
+            if theta is not None:
+                # If the Bellman residual < theta, the utilities are within the error of the optimum
+                residual = expected.max(axis=0)
+                residual *= self.discount
+                residual += self.rewards[mazes]
+                residual -= self.utilities[mazes]
+                residual[self._fixed[mazes]] = 0.0
+                done = np.abs(residual).max(axis=(1, 2)) < theta
+            # If the policy of a maze has converged, it is done
+            else:
+                done = ~changed.any(axis=(1, 2))
+            converged[indices[done]] = True
+
+        print(f"Batched Modified Policy Iteration took {self.iterations.min()} to {self.iterations.max()} iterations "
+              f"({self.backups} backups) to converge {self.n_mazes} mazes")
+        return self.iterations
@@ -6,6 +6,9 @@ class Direction:
     RIGHT: "Direction" = None
     UP: "Direction" = None
     DOWN: "Direction" = None
+    # All actions in clockwise order, starting from LEFT. The position of a
+    # direction in this tuple is its integer action code.
+    ACTIONS: Tuple["Direction", ...] = ()
 
     def __init__(self, vector: Tuple[int, int], icon: str):
         self.vector = vector
@@ -14,6 +17,20 @@ class Direction:
     def __str__(self):
         return self.icon
 
+    @property
+    def index(self) -> int:
+        """
+        Returns the integer action code of the direction
+        """
+        return Direction.ACTIONS.index(self)
+
+    @staticmethod
+    def from_index(index:int) -> "Direction":
+        """
+        Returns the direction with the given integer action code
+        """
+        return Direction.ACTIONS[index]
+
     def rotate_clockwise(self):
         if self is Direction.LEFT:
             return Direction.UP
@@ -46,3 +63,4 @@ Direction.LEFT = Direction(vector=(0, -1), icon="←")
 Direction.RIGHT = Direction(vector=(0, 1), icon="→")
 Direction.UP = Direction(vector=(-1, 0), icon="↑")
 Direction.DOWN = Direction(vector=(1, 0), icon="↓")
+Direction.ACTIONS = (Direction.LEFT, Direction.UP, Direction.RIGHT, Direction.DOWN)
@@ -0,0 +1,195 @@
+from typing import List, Union
+import tkinter as tk
+import numpy as np
+from classes.States import State
+from classes.Maze import Maze
+from classes.Direction import Direction
+from helper.Rendering import render_maze, render_utilities, render_policy, to_ppm
+
+class GridWorldPlotter(tk.Frame):
+    # Mazes with more cells than this are rasterized into one image instead of drawn cell by cell
+    RASTER_MIN_CELLS = 400
+    # Rasterized mazes are scaled down to fit in a canvas of at most this many pixels per side
+    MAX_CANVAS_SIZE = 1000
+    # Rasterized cells smaller than this (in pixels), or mazes with more cells than this, are drawn without their text
+    MIN_TEXT_CELL_SIZE = 20
+    MAX_TEXT_CELLS = 2500
+
+    def __init__(self, master=None, cell_size=70, cols=1, raster:bool=None):
+        """
+        Args:
+            master: The parent widget
+            cell_size: The height and width of every cell in pixels
+            cols (int): The number of canvases per row
+            raster (bool): Whether to rasterize the mazes into images, which is much faster for large
+                mazes. By default, only mazes with more than RASTER_MIN_CELLS cells are rasterized.
+        """
+        super().__init__(master)
+        self.master = master
+        self.cell_size = cell_size
+        self.cols = cols
+        self.raster = raster
+
+        self.n_cols = self.n_rows = 0
+        self.canvas_count = 0
+        # Tk does not keep references to the images on the canvases
+        self._images = []
+
+    def _use_raster(self, maze:Maze):
+        if self.raster is not None:
+            return self.raster
+        return maze.height * maze.width > self.RASTER_MIN_CELLS
+
+    def _draw_image(self, maze:Maze, title:str, image:np.ndarray, texts:List[List[str]]=None, font_size=10):
+        """
+        Draws a rasterized maze on a new canvas, together with the text of every cell if given
+
+        Args:
+            maze (Maze): The maze
+            title (str): The title of the canvas
+            image (np.ndarray): The image, see helper.Rendering
+            texts (List[List[str]]): The text of every cell, see _show_text
+            font_size (int): The font size of the text
+        """
+        cell_size = image.shape[0] // maze.height
+        canvas = self._load_canvas(maze, title, cell_size)
+        photo = tk.PhotoImage(data=to_ppm(image), format="PPM")
+        canvas.create_image(0, 0, anchor=tk.NW, image=photo)
+        self._images.append(photo)
+
+        if texts is None:
+            return
+        for row, row_texts in enumerate(texts):
+            for col, text in enumerate(row_texts):
+                if text:
+                    canvas.create_text((col + 0.5) * cell_size, (row + 0.5) * cell_size, text=text, font=("Purisa", font_size))
+
+    def _get_raster_cell_size(self, maze:Maze):
+        """
+        Returns the cell size of a rasterized maze, scaled down so that the image fits in MAX_CANVAS_SIZE
+        """
+        return max(1, min(int(self.cell_size), self.MAX_CANVAS_SIZE // max(maze.height, maze.width)))
+
+    def _show_text(self, maze:Maze, cell_size:int):
+        """
+        Level of detail of rasterized mazes: the text of the cells is only drawn if the cells are
+        large enough to read it and there are few enough cells for one canvas item per cell
+        """
+        return cell_size >= self.MIN_TEXT_CELL_SIZE and maze.height * maze.width <= self.MAX_TEXT_CELLS
+
+    @staticmethod
+    def _get_reward_style(reward:float):
+        """
+        Returns:
+            Tuple[str, str]: The text and fill colour of a state with the given reward
+        """
+        if reward > 0:
+            return f"+{reward}", "#46E950"
+        elif reward > -1:
+            return "", "#FFFFFF"
+        return str(reward), "#FE922B"
+
+    def _load_canvas(self, maze:Maze, title="", cell_size=None):
+        cell_size = cell_size or self.cell_size
+        self.n_rows = maze.height
+        self.n_cols = maze.width
+        row_pos = self.canvas_count // self.cols
+        col_pos = self.canvas_count % self.cols
+
+        container = tk.Frame(self)
+        container.grid(row=row_pos, column=col_pos, padx=5, pady=5)
+        if title:
+            title_label = tk.Label(container, text=title)
+            title_label.pack(side=tk.TOP, pady=(0, 5))
+
+        canvas = tk.Canvas(container, width=self.n_cols * cell_size,
+                           height=self.n_rows * cell_size)
+        canvas.pack()
+        self.canvas_count += 1
+        return canvas
+
+    def _draw_wall(self, canvas:tk.Canvas, x1, y1, x2, y2):
+        canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill='#808080')
+    
+    def _draw_state(self, canvas:tk.Canvas, x1, y1, x2, y2, text, fill='#FFFFFF', text_color='#000000', font_size=10):
+        canvas.create_rectangle(x1, y1, x2, y2, outline="black", fill=fill)
+        center_x = x1 + self.cell_size / 2
+        center_y = y1 + self.cell_size / 2
+        canvas.create_text(center_x, center_y, text=text, fill=text_color, font=("Purisa", font_size))
+    
+    def draw_estimated_utilities(self, layout:Union[List[List[State]], Maze], utilities:List[List[float]], title="Estimated Utilities", font_size=9):
+        maze = Maze.from_layout(layout)
+        if self._use_raster(maze):
+            cell_size = self._get_raster_cell_size(maze)
+            texts = None
+            if self._show_text(maze, cell_size):
+                texts = [["" if wall else f"{str(utility):^7.7}" for utility, wall in zip(*row)]
+                         for row in zip(np.asarray(utilities).tolist(), maze.walls.tolist())]
+            self._draw_image(maze, title, render_utilities(maze, utilities, cell_size), texts, font_size)
+            return
+
+        canvas = self._load_canvas(maze, title)
+        for row in range(self.n_rows):
+            for col in range(self.n_cols):
+                # Calculate the coordinates for each cell
+                x1 = col * self.cell_size
+                y1 = row * self.cell_size
+                x2 = x1 + self.cell_size
+                y2 = y1 + self.cell_size
+
+                if maze.walls[row, col]:
+                    self._draw_wall(canvas, x1, y1, x2, y2)
+                else:
+                    utility = utilities[row][col]
+                    self._draw_state(canvas, x1, y1, x2, y2, text=f"{str(utility):^7.7}", font_size=font_size)
+        
+    def draw_action(self, layout:Union[List[List[State]], Maze], policy:np.ndarray, title="Action", font_size=20, utilities:np.ndarray=None):
+        maze = Maze.from_layout(layout)
+        if self._use_raster(maze):
+            # The arrows are part of the image, over the utility heatmap if utilities are given
+            self._draw_image(maze, title, render_policy(maze, policy, self._get_raster_cell_size(maze), utilities))
+            return
+
+        canvas = self._load_canvas(maze, title)
+        for row in range(self.n_rows):
+            for col in range(self.n_cols):
+                # Calculate the coordinates for each cell
+                x1 = col * self.cell_size
+                y1 = row * self.cell_size
+                x2 = x1 + self.cell_size
+                y2 = y1 + self.cell_size
+
+                if maze.walls[row, col]:
+                    self._draw_wall(canvas, x1, y1, x2, y2)
+                else:
+                    action = Direction.ACTIONS[policy[row, col]]
+                    self._draw_state(canvas, x1, y1, x2, y2, text=f"{action.icon}", font_size=font_size)
+    
+    def draw_maze(self, layout:Union[List[List[State]], Maze], title="Maze", font_size:int=15, cell_size:int=None):
+        if cell_size:
+            self.cell_size = cell_size
+
+        maze = Maze.from_layout(layout)
+        if self._use_raster(maze):
+            cell_size = self._get_raster_cell_size(maze)
+            texts = None
+            if self._show_text(maze, cell_size):
+                texts = [["" if wall else self._get_reward_style(reward)[0] for reward, wall in zip(*row)]
+                         for row in zip(maze.rewards.tolist(), maze.walls.tolist())]
+            self._draw_image(maze, title, render_maze(maze, cell_size), texts, font_size)
+            return
+
+        canvas = self._load_canvas(maze, title)
+        for row in range(self.n_rows):
+            for col in range(self.n_cols):
+                # Calculate the coordinates for each cell
+                x1 = col * self.cell_size
+                y1 = row * self.cell_size
+                x2 = x1 + self.cell_size
+                y2 = y1 + self.cell_size
+
+                if maze.walls[row, col]:
+                    self._draw_wall(canvas, x1, y1, x2, y2)
+                else:
+                    text, fill = self._get_reward_style(float(maze.rewards[row, col]))
+                    self._draw_state(canvas, x1, y1, x2, y2, text=text, fill=fill, font_size=font_size)
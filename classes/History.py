@@ -0,0 +1,105 @@
+from typing import List, Tuple
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+class UtilityHistory:
+    """
+    Records the utility estimates of a solver after each iteration, for plotting convergence.
+
+    The history is stored in a preallocated (records, tracked states) array that doubles in size
+    when full, so recording costs O(tracked states) per iteration. The array can optionally be a
+    memory-mapped .npy file, which streams the history to disk instead of keeping it in memory.
+    """
+    def __init__(self, walls:np.ndarray, cells:List[Tuple[int, int]]=None, every:int=1, capacity:int=256, path:str=None):
+        """
+        Args:
+            walls (np.ndarray): The wall mask of the maze
+            cells (List[Tuple[int, int]]): The (i, j) coordinates of the states to track, all non-wall states if not given
+            every (int): Only record every n-th iteration
+            capacity (int): The number of records to preallocate
+            path (str): The .npy file to stream the history to, or None to keep it in memory
+        """
+        walls = np.asarray(walls, dtype=bool)
+        self.shape = walls.shape
+        if cells is None:
+            cells = list(zip(*np.nonzero(~walls)))
+        self.cells = [(int(i), int(j)) for i, j in cells]
+        self.indices = np.ravel_multi_index(tuple(np.array(self.cells, dtype=int).reshape(-1, 2).T), self.shape)
+        self.every = every
+        self.path = path
+
+        self.count = 0
+        self._calls = 0
+        self._iterations = np.empty(capacity, dtype=np.int64)
+        self._data = self._allocate(capacity)
+
+    @property
+    def labels(self) -> List[str]:
+        return [f"State({i},{j})" for i, j in self.cells]
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        The recorded utilities, of shape (records, tracked states)
+        """
+        return self._data[:self.count]
+
+    @property
+    def iterations(self) -> np.ndarray:
+        """
+        The iteration number of every record
+        """
+        return self._iterations[:self.count]
+
+    def _allocate(self, capacity:int):
+        shape = (capacity, len(self.indices))
+        if self.path is None:
+            return np.empty(shape)
+        return open_memmap(self.path, mode="w+", dtype=np.float64, shape=shape)
+
+    def _resize(self, capacity:int):
+        """
+        Moves the records into an array with room for the given number of records
+        """
+        self._iterations = np.resize(self._iterations, capacity)
+        shape = (capacity, len(self.indices))
+        if self.path is None:
+            data = np.empty(shape)
+            data[:self.count] = self._data[:self.count]
+        else:
+            # Copy the history into a file of the new size, then move it in place of the old one
+            tmp_path = f"{self.path}.tmp"
+            data = open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=shape)
+            data[:self.count] = self._data[:self.count]
+            data.flush()
+            del data, self._data
+            os.replace(tmp_path, self.path)
+            data = open_memmap(self.path, mode="r+")
+        self._data = data
+
+    def record(self, utilities:np.ndarray):
+        """
+        Records the utilities of the tracked states after an iteration
+
+        Args:
+            utilities (np.ndarray): The utilities of all states
+        """
+        self._calls += 1
+        if (self._calls - 1) % self.every:
+            return
+        if self.count == len(self._data):
+            self._resize(max(2 * len(self._data), 1))
+        self._data[self.count] = np.asarray(utilities).ravel()[self.indices]
+        self._iterations[self.count] = self._calls
+        self.count += 1
+
+    def close(self):
+        """
+        Trims a streamed history file to the records actually made, so that it can be loaded with np.load
+        """
+        if self.path is not None and 0 < self.count != len(self._data):
+            self._resize(self.count)
+        if self.path is not None:
+            self._data.flush()
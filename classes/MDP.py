@@ -1,106 +1,530 @@
-from typing import List
+from typing import Dict, List, Tuple, Union
+import heapq
+import warnings
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from classes.States import State
+from classes.Maze import Maze
 from classes.Direction import Direction
-from classes.Plotters import UtilityPlotter
+from classes.Transitions import TransitionModel
+from helper.LinearSolvers import solve_policy_system, HAS_SCIPY
+from classes.History import UtilityHistory
+from classes.Stats import SolverStats
+
+# Orders in which states are backed up by the asynchronous (in-place) solvers
+SWEEP_ORDERS = ("row-major", "reverse", "alternating", "terminal", "red-black")
+# Directions of the sweeps of the "alternating" order, one after another
+ALTERNATING_ORDERS = ("row-major", "reverse", "column-major", "reverse-column-major")
+# Precision of the utilities: "float64", "float32" (stored and calculated in single precision)
+# or "mixed" (stored in single precision, calculated in double precision)
+PRECISIONS = ("float64", "float32", "mixed")
 
 
 class MDP:
-    def __init__(self, layout:List[List[State]], discount:float):
+    def __init__(self, layout:Union[List[List[State]], Maze], discount:float, history:Union[bool, UtilityHistory]=False,
+                 stats:Union[bool, SolverStats]=False, precision:str="float64", absorbing:bool=False):
+        """
+        Args:
+            layout (Union[List[List[State]], Maze]): The maze layout
+            discount (float): The discount factor
+            history (Union[bool, UtilityHistory]): Whether to record the utilities after every iteration
+                for plot_utilities, or the UtilityHistory to record them in. Disabled by default.
+            stats (Union[bool, SolverStats]): Whether to profile the solve, or the SolverStats to record
+                the profile in (e.g. to set a per-iteration callback). Disabled by default.
+            precision (str): The precision of the utilities, one of PRECISIONS. Single precision halves
+                the memory of the utilities and rewards, see the README for its error.
+            absorbing (bool): Whether the terminal states are absorbing, i.e. end the episode once
+                entered. Their utility is then fixed at their reward and only the remaining states
+                are solved for. By default, terminal states transition like any other state.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}.")
+        self.precision = precision
+        self.dtype = np.float64 if precision == "float64" else np.float32
+        self._compute_dtype = np.float32 if precision == "float32" else np.float64
+
         self.layout = layout
-        self.height:int = len(self.layout)
-        self.width:int = len(self.layout[0])
+        self.maze = Maze.from_layout(layout)
+        self.height:int = self.maze.height
+        self.width:int = self.maze.width
         self.discount = discount
-
-        self.policy = [
-            [Direction.LEFT for _ in range(self.width)]
-            for _ in range(self.height)
-        ]
-        self.utilities = [
-            [0.0 for _ in range(self.width)]
-            for _ in range(self.height)
-        ]
-        self.prev_utilities = [
-            [0.0 for _ in range(self.width)]
-            for _ in range(self.height)
-        ]
-
-        self.utility_plotter = UtilityPlotter()
+        self.absorbing = absorbing
+
+        # Compile the maze once into the transition model shared by all solvers
+        self.rewards = self.maze.rewards.astype(self.dtype, copy=False)
+        self.walls = self.maze.walls.view(bool)
+        self.terminals = self.maze.terminals.view(bool)
+        self.transitions = TransitionModel(self.walls, self.terminals if absorbing else None)
+        self._successors = None
+        self._sweep_groups = {}
+        self._set_fixed_utilities()
+
+        # Action code of every state, see Direction.ACTIONS
+        self.policy = np.full((self.height, self.width), Direction.LEFT.index, dtype=np.int8)
+        self.utilities = self._fixed_utilities.copy()
+        self.prev_utilities = self._fixed_utilities.copy()
+
+        # Number of sweeps over the maze and of single state backups performed so far
+        self.sweeps = 0
+        self.backups = 0
+
+        if history is True:
+            history = UtilityHistory(self.walls)
+        self.history = history or None
+
+        if stats is True:
+            stats = SolverStats()
+        self.stats = stats or None
     
-    def _agent_will_move(self, i:int, j:int, di:int, dj:int):
+    def _set_fixed_utilities(self):
+        """
+        Finds the states that are not backed up and their utilities, 0 for walls and the reward
+        for absorbing terminal states
         """
-        Returns true if the action will move agent to a square
-        Returns false if the action will move agent out of bounds or into a wall
+        self._fixed = self.walls | self.terminals if self.absorbing else self.walls
+        self._fixed_utilities = np.where(self._fixed & ~self.walls, self.rewards, 0).astype(self.dtype)
+
+    def set_initial_guess(self, utilities:np.ndarray=None, policy:np.ndarray=None):
+        """
+        Seeds the next solve, e.g. with the solution of the same maze for a nearby discount
 
         Args:
-            i (int): x-coordinate of state
-            j (int): y-coordinate of state
-            di (int): x-direction of action vector
-            dj (int): y-direction of action vector
-        """ 
-        return 0 <= i + di < self.height and 0 <= j + dj < self.width and \
-            not self.layout[i+di][j+dj].is_wall
-    
-    def _get_expected_utilty(self, i:int, j:int, action:Direction):
+            utilities (np.ndarray): The initial utilities of every state. The utilities of walls and
+                absorbing states stay fixed.
+            policy (np.ndarray): The initial action code of every state
+        """
+        if utilities is not None:
+            self.utilities[...] = utilities
+            np.copyto(self.utilities, self._fixed_utilities, where=self._fixed)
+            np.copyto(self.prev_utilities, self.utilities)
+        if policy is not None:
+            self._set_policy(policy)
+
+    def _get_expected_utilities(self):
+        '''
+        Calculates ∑P(s'|s,a)U(s') - the expected utilty of taking action a in state s, for every state and action
+
+        Returns:
+            np.ndarray: The expected utilities of the previous utilities, of shape (4, height, width) indexed by action code
         '''
-        Calculates ∑P(s'|s,a)U(s') - the expected utilty of taking action a in state s
+        return self.transitions.expected_utilities(self.prev_utilities, dtype=self._compute_dtype)
+
+    def _update_prev_values(self):
+        """
+        Updates the previous Q-values with the newly calculated Q-values
+        """
+        np.copyto(self.prev_utilities, self.utilities)
+
+    def _set_policy(self, actions:np.ndarray):
+        """
+        Updates the policy from a grid of action codes
 
         Args:
-            i (int): x-coordinate of state
-            j (int): y-coordinate of state
-            action (Direction): The action taken by the agent at this state
+            actions (np.ndarray): The action code of every state
+        """
+        self.policy = np.asarray(actions, dtype=np.int8).copy()
+
+    def _get_policy_actions(self):
+        """
+        Returns a copy of the action code of every state under the current policy
+        """
+        return self.policy.copy()
+
+    def _get_policy_rewards(self, actions:np.ndarray):
+        """
+        Calculates the right-hand side of the policy evaluation system over the live states: R(s),
+        plus γ∑P(s'|s,π(s))U(s') over the absorbing successors s', whose utilities are fixed
+
+        Args:
+            actions (np.ndarray): The action code of every state
+        """
+        rewards = self.rewards.ravel()[self.transitions.live].astype(np.float64, copy=False)
+        if self.absorbing:
+            rewards += self.discount * self.transitions.absorbed_utilities(actions, self._fixed_utilities)
+        return rewards
+
+    def _improve_policy(self, tolerance:float=None, expected:np.ndarray=None):
+        """
+        Switches every state to its best action under the previous utilities
+
+        Args:
+            tolerance (float): The minimum gain in expected utility for a state to switch action,
+                or None to switch whenever the best action differs from the current one
+            expected (np.ndarray): The expected utilities of the previous utilities, if already calculated
 
         Returns:
-            float: The expected utilty of taking action a in state s
-        '''
-        value = 0
-
-        # Add the discounted rewards of current policies to value
-        # Intended outcome happens (P = 0.8)
-        di, dj = action.vector
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            value += 0.8 * self.prev_utilities[i+di][j+dj]
-        # Action results in staying
+            int: The number of states whose action changed
+        """
+        if expected is None:
+            expected = self._get_expected_utilities()
+        best_actions = np.argmax(expected, axis=0)
+        if tolerance is None:
+            changed = best_actions != self.policy
         else:
-            value += 0.8 * self.prev_utilities[i][j]
-
-        # 1st unintended outcome happens (P = 0.1)
-        di, dj = action.rotate_anticlockwise().vector
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            value += 0.1 * self.prev_utilities[i+di][j+dj]
-        # Action results in staying
+            current_utilities = np.take_along_axis(expected, self.policy[None].astype(np.intp), axis=0)[0]
+            changed = expected.max(axis=0) > current_utilities + tolerance
+        # Ignore states that are walls or absorbing
+        changed &= ~self._fixed
+        self.policy[changed] = best_actions[changed]
+        return int(np.count_nonzero(changed))
+
+    def _get_bands(self, workers:int):
+        """
+        Splits the rows of the maze into one band per worker
+
+        Returns:
+            List[Tuple[int, int]]: The start and end row of every band
+        """
+        edges = np.linspace(0, self.height, min(workers, self.height) + 1).astype(int).tolist()
+        return list(zip(edges[:-1], edges[1:]))
+
+    def _sweep_bands(self, bands:List[Tuple[int, int]], executor:ThreadPoolExecutor=None, actions:np.ndarray=None):
+        """
+        Performs one synchronous Bellman update of the utilities from the previous utilities, one
+        band of rows at a time. Each band only reads its own rows of the previous utilities and the
+        boundary rows of its neighbours, so with an executor the bands are updated in parallel threads
+        (NumPy releases the GIL while doing so).
+
+        Args:
+            bands (List[Tuple[int, int]]): The bands of rows, see _get_bands
+            executor (ThreadPoolExecutor): The thread pool to update the bands in, or None to update them serially
+            actions (np.ndarray): The action code of every state for policy evaluation, or None
+                to back up with the best action
+
+        Returns:
+            float: The maximum change of utility
+        """
+        def backup_band(band):
+            r0, r1 = band
+            expected = self.transitions.expected_utilities(self.prev_utilities, rows=band, dtype=self._compute_dtype)
+            # In mixed precision the update is calculated in double precision before it is stored
+            utilities = self.utilities[r0:r1]
+            if utilities.dtype != expected.dtype:
+                utilities = np.empty(utilities.shape, dtype=expected.dtype)
+            if actions is None:
+                np.max(expected, axis=0, out=utilities)
+            else:
+                utilities[...] = np.take_along_axis(expected, actions[None, r0:r1], axis=0)[0]
+            utilities *= self.discount
+            utilities += self.rewards[r0:r1]
+            np.copyto(utilities, self._fixed_utilities[r0:r1], where=self._fixed[r0:r1])
+            delta = np.abs(utilities - self.prev_utilities[r0:r1]).max(initial=0.0)
+            self.utilities[r0:r1] = utilities
+            return delta
+
+        if executor is None:
+            deltas = list(map(backup_band, bands))
         else:
-            value += 0.1 * self.prev_utilities[i][j]
-
-        # 2nd unintended outcome happens
-        di, dj = action.rotate_clockwise().vector
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            value += 0.1 * self.prev_utilities[i+di][j+dj]
-        # Action results in staying
+            deltas = list(executor.map(backup_band, bands))
+        self.sweeps += 1
+        self.backups += len(self.transitions.live)
+        return max(deltas)
+
+    def _resolve_sweep_order(self, order:str):
+        """
+        Returns the order of the next asynchronous sweep, i.e. the direction of this sweep for "alternating"
+        """
+        if order == "alternating":
+            return ALTERNATING_ORDERS[self.sweeps % len(ALTERNATING_ORDERS)]
+        return order
+
+    def _get_sweep_groups(self, order:str):
+        """
+        Finds the groups of live states backed up one after another in the next asynchronous sweep.
+        The states of a group are backed up together in one vectorized update, and every group
+        already sees the utilities updated by the groups before it (Gauss-Seidel style).
+
+        Args:
+            order (str): "row-major" (one row at a time), "reverse" (reverse row-major), "alternating"
+                (cycles through row-major, reverse row-major, column-major and reverse column-major
+                sweeps), "terminal" (outwards from the terminal states, one distance at a time) or
+                "red-black" (the two colours of the checkerboard, see TransitionModel.live_colours)
+
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: The indices of the states of every group in row-major
+                indexing and their successors, of shape (4, 3, len(states)) indexed by action and outcome
+        """
+        order = self._resolve_sweep_order(order)
+        if order in self._sweep_groups:
+            return self._sweep_groups[order]
+
+        live = self.transitions.live
+        if order in ("row-major", "reverse"):
+            groups = self._split_groups(live, live // self.width)
+        elif order in ("column-major", "reverse-column-major"):
+            live = live[np.lexsort((live // self.width, live % self.width))]
+            groups = self._split_groups(live, live % self.width)
+        elif order == "terminal":
+            distances = self.transitions.distances_from(self.terminals).ravel()[live]
+            # States that cannot reach a terminal state are backed up last, together
+            distances[np.isinf(distances)] = distances[np.isfinite(distances)].max(initial=-1) + 1
+            indices = np.argsort(distances, kind="stable")
+            groups = self._split_groups(live[indices], distances[indices])
+        elif order == "red-black":
+            colours = self.transitions.live_colours
+            groups = [live[colours == 0], live[colours == 1]]
         else:
-            value += 0.1 * self.prev_utilities[i][j]
-        
-        return value
+            raise ValueError(f"Unknown sweep order {order!r}, expected one of {SWEEP_ORDERS}.")
 
-    def _update_prev_values(self):
+        if order.startswith("reverse"):
+            groups = groups[::-1]
+        groups = [(states, self.transitions.successors[:, :, states]) for states in groups]
+        self._sweep_groups[order] = groups
+        return groups
+
+    @staticmethod
+    def _split_groups(states:np.ndarray, keys:np.ndarray):
         """
-        Updates the previous Q-values with the newly calculated Q-values
+        Splits sorted states into groups of consecutive states with the same key
         """
-        for i in range(self.height):
-            for j in range(self.width):
-                self.prev_utilities[i][j] = self.utilities[i][j]
+        return np.split(states, np.flatnonzero(np.diff(keys)) + 1)
+
+    def _get_successor_lists(self):
+        """
+        Returns the successors of the transition model as nested lists for fast per-state access,
+        where successors[s][a] holds the (intended, anticlockwise, clockwise) successors of action a in state s
+        """
+        if self._successors is None:
+            self._successors = self.transitions.successors.transpose(2, 0, 1).tolist()
+        return self._successors
+
+    def _get_policy_groups(self, groups:List[Tuple[np.ndarray, np.ndarray]], actions:np.ndarray):
+        """
+        Restricts the successors of the groups of a sweep to the actions of a policy
+
+        Args:
+            groups (List[Tuple[np.ndarray, np.ndarray]]): The groups of the sweep, see _get_sweep_groups
+            actions (np.ndarray): The action code of every state
+
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: The states of every group and the successors of their
+                actions, of shape (1, 3, len(states))
+        """
+        actions = actions.ravel()
+        return [
+            (states, successors[actions[states], :, np.arange(len(states))].T[None])
+            for states, successors in groups
+        ]
+
+    def _sweep_in_place(self, groups:List[Tuple[np.ndarray, np.ndarray]]):
+        """
+        Backs up the groups of states one at a time, updating the utilities in place so that later
+        groups in the sweep already see the new utilities (Gauss-Seidel style). Every state is
+        backed up with the best of the actions whose successors are given.
+
+        Args:
+            groups (List[Tuple[np.ndarray, np.ndarray]]): The states of every group and their successors,
+                see _get_sweep_groups, or _get_policy_groups for policy evaluation
+
+        Returns:
+            float: The maximum change of utility in this sweep
+        """
+        utilities = self.utilities.ravel()
+        rewards = self.rewards.ravel()
+        p_intended, p_anticlockwise, p_clockwise = self.transitions.probabilities.astype(self._compute_dtype)
+        delta = 0.0
+        for states, successors in groups:
+            values = utilities[successors].astype(self._compute_dtype, copy=False)
+            expected = p_intended * values[:, 0] + p_anticlockwise * values[:, 1] + p_clockwise * values[:, 2]
+            value = rewards[states] + self.discount * expected.max(axis=0)
+            delta = max(delta, float(np.abs(value - utilities[states]).max(initial=0.0)))
+            utilities[states] = value
+        self.utilities = utilities.reshape(self.height, self.width)
+        self.sweeps += 1
+        self.backups += len(self.transitions.live)
+        return delta
+
+    def _get_resolution(self):
+        """
+        Finds the smallest change of utility that can be reliably detected at the precision of the
+        utilities. In single precision, rounding the utilities keeps the change of a sweep from
+        getting much below the spacing of single precision numbers around the largest utility.
+        """
+        if self.dtype == np.float64:
+            return 0.0
+        return 2 * np.finfo(self.dtype).eps * np.abs(self.utilities).max(initial=0.0)
+
+    def _has_converged(self, delta:float, theta:float, warn:bool=True):
+        """
+        Checks whether a change of utility is below the termination threshold, or below the
+        resolution of the utilities if the threshold is finer than their precision
+
+        Args:
+            delta (float): The change of utility
+            theta (float): The termination threshold
+            warn (bool): Whether to warn if the change is only below the resolution, i.e. the
+                result will not be within the requested error
+        """
+        if delta < theta:
+            return True
+        if self.dtype == np.float64 or delta > self._get_resolution():
+            return False
+        if warn:
+            self._warn_resolution(delta, theta)
+        return True
+
+    def _warn_resolution(self, delta:float, theta:float):
+        """
+        Warns that a solve stopped at the resolution of the utilities before reaching its threshold,
+        so that its result is not within the requested error
+        """
+        bound = delta * self.discount / (1 - self.discount)
+        error = theta * self.discount / (1 - self.discount)
+        warnings.warn(f"Stopped at a change of utility of {delta:.1e}, which cannot get below the threshold of {theta:.1e} "
+                      f"at {self.precision} precision. The utilities are only within {bound:.1e} of the optimum instead "
+                      f"of the requested {error:.1e}, use precision=\"float64\" for this error.", RuntimeWarning, stacklevel=3)
+
+    def _time_phase(self, phase:str):
+        """
+        Times a phase of the solve in the solver stats, if enabled
+
+        Args:
+            phase (str): The phase, one of SolverStats.PHASES
+        """
+        return self.stats.phase(phase) if self.stats is not None else nullcontext()
+
+    def _end_iteration(self, delta:float=None, policy_changes:int=None):
+        """
+        Records the counters of an iteration in the solver stats, if enabled
+        """
+        if self.stats is not None:
+            self.stats.end_iteration(self.backups, delta, policy_changes)
+
+    def _record_history(self):
+        """
+        Records the current utilities in the utility history, if enabled
+        """
+        if self.history is not None:
+            with self._time_phase("history"):
+                self.history.record(self.utilities)
+
+    def _invalidate_caches(self):
+        """
+        Drops the structures derived from the transition model, after the maze has been edited
+        """
+        self._successors = None
+        self._sweep_groups = {}
+
+    def apply_edits(self, edits:Dict[Tuple[int, int], State], error:float=None):
+        """
+        Changes some cells of the maze of a (typically already solved) MDP. The transition model is
+        only re-derived around the edited cells, and the current utilities and policy are kept.
+
+        If an error is given, the utilities are then re-converged by value iteration warm-started
+        from the current utilities. Only a window around the states whose utility is still changing
+        is backed up, starting from the edited cells and growing outwards as the change propagates,
+        until a full sweep changes no utility by more than the threshold. The policy is then the
+        best action under the new utilities, which solve() can refine further.
+
+        Args:
+            edits (Dict[Tuple[int, int], State]): The new state of every edited (i, j) cell, where
+                negative indices count from the end. Raises ValueError for cells outside the maze.
+            error (float): The threshold to terminate the re-convergence, as in value iteration.
+                The utilities are not updated if not given.
+
+        Returns:
+            int: The number of backups made to re-converge
+        """
+        # Edit a copy, as the maze may be shared with the caller or other solvers
+        maze = Maze(self.maze.rewards.copy(), self.maze.walls.copy(), self.maze.terminals.copy())
+        # Row-major index of every edited cell, counting negative indices from the end as NumPy does
+        rows, columns = np.array(list(edits), dtype=np.intp).reshape(-1, 2).T
+        rows = np.where(rows < 0, rows + self.height, rows)
+        columns = np.where(columns < 0, columns + self.width, columns)
+        cells = np.ravel_multi_index((rows, columns), self.maze.shape)
+        for cell, state in zip(cells, edits.values()):
+            maze.rewards.ravel()[cell] = state.reward
+            maze.walls.ravel()[cell] = state.is_wall
+            maze.terminals.ravel()[cell] = state.is_terminal
+
+        wall_changes = cells[maze.walls.ravel()[cells] != self.maze.walls.ravel()[cells]]
+        self.layout = self.maze = maze
+        self.rewards = maze.rewards.astype(self.dtype, copy=False)
+        self.walls = maze.walls.view(bool)
+        self.terminals = maze.terminals.view(bool)
+        self.transitions.update_walls(self.walls, wall_changes, self.terminals if self.absorbing else None)
+        self._invalidate_caches()
+
+        self._set_fixed_utilities()
+        np.copyto(self.utilities, self._fixed_utilities, where=self._fixed)
+        np.copyto(self.prev_utilities, self._fixed_utilities, where=self._fixed)
+        if error is None or len(cells) == 0:
+            return 0
+
+        seeds = np.zeros((self.height, self.width), dtype=bool)
+        seeds.ravel()[cells] = True
+        return self._solve_locally(error * (1 - self.discount) / self.discount, seeds)
+
+    def _solve_locally(self, theta:float, active:np.ndarray):
+        """
+        Re-converges the utilities by synchronous Bellman updates of the smallest window that
+        covers the states that may still change, i.e. the active states and their predecessors
+
+        Args:
+            theta (float): The threshold on the change of utility of a full sweep
+            active (np.ndarray): Boolean mask of the states whose Bellman update changed
+
+        Returns:
+            int: The number of backups made
+        """
+        backups = self.backups
+        while True:
+            # Predecessors are at most one move away, so grow the active states by one cell
+            window = active.copy()
+            window[1:] |= active[:-1]
+            window[:-1] |= active[1:]
+            window[:, 1:] |= active[:, :-1]
+            window[:, :-1] |= active[:, 1:]
+            window &= ~self._fixed
+
+            # Once no state is active, verify the convergence with a sweep of the whole maze
+            full_sweep = not window.any()
+            if full_sweep:
+                r0, r1, c0, c1 = 0, self.height, 0, self.width
+            else:
+                rows, cols = np.nonzero(window)
+                r0, r1, c0, c1 = rows.min(), rows.max() + 1, cols.min(), cols.max() + 1
+
+            with self._time_phase("evaluation"):
+                utilities = self.transitions.expected_utilities(self.utilities, (r0, r1), (c0, c1), self._compute_dtype).max(axis=0)
+                utilities *= self.discount
+                utilities += self.rewards[r0:r1, c0:c1]
+                fixed = self._fixed[r0:r1, c0:c1]
+                np.copyto(utilities, self._fixed_utilities[r0:r1, c0:c1], where=fixed)
+                change = np.abs(utilities - self.utilities[r0:r1, c0:c1])
+                changed = change >= max(theta, self._get_resolution())
+                self.utilities[r0:r1, c0:c1] = utilities
+            self.sweeps += 1
+            self.backups += int(np.count_nonzero(~fixed))
+            self._record_history()
+            self._end_iteration()
+
+            if full_sweep and not changed.any():
+                delta = change.max(initial=0.0)
+                if delta >= theta:
+                    self._warn_resolution(delta, theta)
+                break
+            active = np.zeros_like(active)
+            active[r0:r1, c0:c1] = changed
+
+        self._update_prev_values()
+        with self._time_phase("improvement"):
+            self._set_policy(np.argmax(self.transitions.expected_utilities(self.utilities, dtype=self._compute_dtype), axis=0))
+        return self.backups - backups
 
     def plot_utilities(self):
-        self.utility_plotter.plot()
+        if self.history is None:
+            raise ValueError("No utility history was recorded, create the solver with history=True to plot it.")
+        # Plotting dependencies are only imported when needed, so the solvers can run headless
+        from classes.Plotters import UtilityPlotter
+        UtilityPlotter(self.history).plot()
 
     # For dev purposes
     def print_utilities(self):
         for i in range(self.height):
             for j in range(self.width):
-                if self.layout[i][j].is_wall:
+                if self.walls[i, j]:
                     print(f"[ {'#':^5.5} ]", end=" ")
                 else:
                     print(f"[ {str(self.utilities[i][j]):^5.5} ]", end=" ")
@@ -109,250 +533,475 @@ class MDP:
     def print_actions(self):
         for i in range(self.height):
             for j in range(self.width):
-                if self.layout[i][j].is_wall:
+                if self.walls[i, j]:
                     print("[ # ]", end=" ")
                 else:
-                    print(f"[ {self.policy[i][j].icon} ]", end=" ")
+                    print(f"[ {Direction.ACTIONS[self.policy[i, j]].icon} ]", end=" ")
             print()
 
 
 class ValueIteration(MDP):
-    def solve(self, error:float):
+    def solve(self, error:float, asynchronous:bool=False, order:str="row-major", workers:int=1):
         """
         Finds the optimum policy and estimated utilities of the MDP
 
         Args:
             error (float): The threshold to terminate the value iteration algorithm
+            asynchronous (bool): Whether to update the utilities in place, one group of states
+                (e.g. one row) at a time, instead of synchronously from the previous utilities
+            order (str): The sweep order of asynchronous updates, one of SWEEP_ORDERS. Only "red-black"
+                is a true Gauss-Seidel sweep, as no state of a colour depends on another state of the
+                same colour. The other orders back up a whole row, column or distance from the
+                terminal states at once, so the states of a group only see the old utilities of each
+                other, and they are typically slower than synchronous sweeps.
+            workers (int): The number of threads sharing each synchronous sweep, one band of rows each
         """
         theta = error * (1 - self.discount) / self.discount
+        if asynchronous:
+            iteration = self._solve_in_place(theta, order)
+        elif workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                iteration = self._solve_synchronously(theta, self._get_bands(workers), executor)
+        else:
+            iteration = self._solve_synchronously(theta, self._get_bands(1))
+
+        print(f"Value Iteration took {iteration} iterations ({self.backups} backups) to converge")
+        return iteration
+
+    def _solve_synchronously(self, theta:float, bands:List[Tuple[int, int]], executor:ThreadPoolExecutor=None):
         iteration = 0
 
         while True:
-            delta = 0.0
             iteration += 1
-            
-            # Iterate through each state in the maze
-            for i in range(self.height):
-                for j in range(self.width):
-                    state = self.layout[i][j]
-                    # Ignore state if state is a wall
-                    if state.is_wall:
-                        continue
-
-                    # Find best action by calculating Q(s,a) for each action
-                    max_q = float('-inf')
-                    best_action = action = Direction.LEFT
-
-                    # Try all four possible actions
-                    for _ in range(4):
-                        value = state.reward + self.discount * self._get_expected_utilty(i, j, action)
-                        if value > max_q:
-                            max_q = value
-                            best_action = action
-                        action = action.rotate_clockwise()
-                    
-                    # Update the utlities and best action
-                    self.policy[i][j] = best_action
-                    self.utilities[i][j] = max_q
-        
-                    # Update maximum delta
-                    delta = max(delta, abs(self.utilities[i][j] - self.prev_utilities[i][j]))
-            
-            # Updates the value of each state synchronously
-            self._update_prev_values()
+
+            # Update the utilities with the best action from the previous utilities and find maximum delta
+            with self._time_phase("evaluation"):
+                delta = self._sweep_bands(bands, executor)
 
             # Add data to plot
-            self.utility_plotter.add_data(self.utilities, self.layout)
-        
+            self._record_history()
+            self._end_iteration(delta)
+
             # If delta < theta, the policy has converged and we terminate the evaluation
-            if delta < theta:
+            if self._has_converged(delta, theta):
                 break
-                
-        print(f"Value Iteration took {iteration} iterations to converge")
+
+            # Updates the value of each state synchronously by swapping the buffers
+            self.utilities, self.prev_utilities = self.prev_utilities, self.utilities
+
+        # The policy is the best action of the last update, which was made from the previous utilities
+        with self._time_phase("improvement"):
+            self._set_policy(np.argmax(self.transitions.expected_utilities(self.prev_utilities, dtype=self._compute_dtype), axis=0))
+        self._update_prev_values()
         return iteration
 
-class PolicyIteration(MDP):
-    def _get_linear_equation(self, i:int, j:int, action:Direction):
+    def _solve_in_place(self, theta:float, order:str):
+        iteration = 0
+
+        while True:
+            iteration += 1
+            with self._time_phase("evaluation"):
+                delta = self._sweep_in_place(self._get_sweep_groups(order))
+
+            # Add data to plot
+            self._record_history()
+            self._end_iteration(delta)
+
+            # If delta < theta, the policy has converged and we terminate the evaluation
+            if self._has_converged(delta, theta):
+                break
+
+        self.prev_utilities = self.utilities.copy()
+        with self._time_phase("improvement"):
+            self._set_policy(np.argmax(self.transitions.expected_utilities(self.utilities, dtype=self._compute_dtype), axis=0))
+        return iteration
+
+    def refine(self, error:float, method:str="auto"):
         """
-        Finds the simplified version of the Bellman equation of a state: U(s) = R(s) + γ∑P(s'|s,π(s))U(s') = -R(s)
+        Converges the utilities from a good initial guess (e.g. the solution of a nearby discount,
+        see set_initial_guess) by alternating a Bellman update with an evaluation of the greedy
+        policy of the update, warm-started from the updated utilities. Terminates like value
+        iteration, once a Bellman update changes no utility by more than the threshold.
 
         Args:
-            i (int): x-coordinate of state
-            j (int): y-coordinate of state
-            action (Direction): The action taken by the agent in this state - A(s)
+            error (float): The threshold to terminate the refinement, as in value iteration
+            method (str): The linear solver used to evaluate the greedy policies, see
+                helper.LinearSolvers.solve_policy_system. With "auto", BiCGSTAB is used when
+                SciPy is available and Gauss-Seidel otherwise.
 
         Returns:
-            List[int]: The linear equation representing the simplified version of the Bellman equation
+            int: The number of Bellman updates made
         """
-        # Initializes the linear equation
-        eqn = [0 for _ in range(self.width * self.height)]
-        state = self.layout[i][j]
+        if method == "auto":
+            method = "bicgstab" if HAS_SCIPY else "gauss-seidel"
+        theta = error * (1 - self.discount) / self.discount
+        live = self.transitions.live
+        bands = self._get_bands(1)
+        iteration = 0
+        while True:
+            iteration += 1
+            np.copyto(self.prev_utilities, self.utilities)
+            with self._time_phase("evaluation"):
+                delta = self._sweep_bands(bands)
+            self._record_history()
+            self._end_iteration(delta)
+
+            # If delta < theta, the utilities have converged and we terminate the refinement
+            if self._has_converged(delta, theta):
+                break
 
-        # If state is a wall, there are no actions to consider
-        if state.is_wall:
-            return eqn
-        
-        # numpy.linalg.solve expects the linear system in this format:
-        # -U(s) + γ∑P(s'|s,π(s))U(s') = -R(s)
-        eqn[i * self.width + j] += -1
-
-        # Intended outcome happens (P = 0.8)
-        di, dj = action.vector
-        ni, nj = i+di, j+dj
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            eqn[ni * self.width + nj] += self.discount * 0.8
-        # Action results in staying
-        else:
-            eqn[i * self.width + j] += self.discount * 0.8
-
-        # 1st unintended outcome happens (P = 0.1)
-        di, dj = action.rotate_anticlockwise().vector
-        ni, nj = i+di, j+dj
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            eqn[ni * self.width + nj] += self.discount * 0.1
-        # Action results in staying
-        else:
-            eqn[i * self.width + j] += self.discount * 0.1
-
-        # 2nd unintended outcome happens
-        di, dj = action.rotate_clockwise().vector
-        ni, nj = i+di, j+dj
-        # Action results in movement
-        if self._agent_will_move(i, j, di, dj):
-            eqn[ni * self.width + nj] += self.discount * 0.1
-        # Action results in staying
-        else:
-            eqn[i * self.width + j] += self.discount * 0.1
-        
-        return eqn
+            # Evaluate the greedy policy of the update, starting from the updated utilities
+            with self._time_phase("evaluation"):
+                actions = np.argmax(self._get_expected_utilities(), axis=0)
+                columns, probabilities = self.transitions.policy_transitions(actions)
+                x0 = self.utilities.ravel()[live].astype(np.float64)
+                self.utilities.ravel()[live] = solve_policy_system(columns, probabilities, self._get_policy_rewards(actions),
+                                                                   self.discount, method=method, x0=x0, colours=self.transitions.live_colours)
+
+        # The policy is the best action of the last update, which was made from the previous utilities
+        with self._time_phase("improvement"):
+            self._set_policy(np.argmax(self._get_expected_utilities(), axis=0))
+        self._update_prev_values()
+
+        print(f"Value Iteration took {iteration} refinement iterations ({self.backups} backups) to converge")
+        return iteration
 
-    def _policy_evaluation(self):
+class PrioritizedSweeping(MDP):
+    def _get_bellman_error(self, utilities:List[float], s:int):
         """
-        Evaluates the policy by solving the system of linear equations
+        Calculates |max_a Q(s,a) - U(s)| - the change of utility a backup of state s would make
+
+        Args:
+            utilities (List[float]): The utilities of all states in row-major indexing
+            s (int): The index of the state
+
+        Returns:
+            Tuple[float, float]: The backed up utility and the Bellman error of the state
         """
-        a = []
-        b = [-self.layout[i][j].reward for i in range(self.height) for j in range(self.width)]
-        for i in range(self.height):
-            for j in range(self.width):
-                a.append(self._get_linear_equation(i, j, self.policy[i][j]))
+        p_intended, p_anticlockwise, p_clockwise = self._probabilities
+        max_utility = float('-inf')
+        for s0, s1, s2 in self._successors[s]:
+            utility = p_intended * utilities[s0] + p_anticlockwise * utilities[s1] + p_clockwise * utilities[s2]
+            if utility > max_utility:
+                max_utility = utility
+        value = self._rewards[s] + self.discount * max_utility
+        return value, abs(value - utilities[s])
+
+    def solve(self, error:float):
+        """
+        Finds the optimum policy and estimated utilities of the MDP by backing up the state with the
+        largest Bellman error first.
+
+        The priority of a state is an upper bound on its Bellman error. A backup that changes U(s)
+        by Δ changes the Bellman error of every predecessor p by at most γ·max_a P(s|p,a)·|Δ|, so
+        this is added to the priority of p instead of backing up p again to find its new error.
+        Once no priority reaches the threshold, every Bellman error is below it, as when value
+        iteration terminates.
+
+        Args:
+            error (float): The threshold to terminate the algorithm, as in value iteration
+
+        Returns:
+            int: The number of backups performed, including the initial backup of every state to
+                find its Bellman error
+        """
+        theta = error * (1 - self.discount) / self.discount
+        self._get_successor_lists()
+        self._probabilities = self.transitions.probabilities.tolist()
+        self._rewards = self.rewards.ravel().tolist()
+        with self._time_phase("evaluation"):
+            predecessors = self.transitions.predecessors()
+            live = self.transitions.live
+            expected = self.transitions.expected_utilities(self.utilities, dtype=self._compute_dtype).max(axis=0)
+            bellman_errors = np.abs(self.rewards + self.discount * expected - self.utilities).ravel()
+            utilities = self.utilities.ravel().tolist()
+            backups = len(live)
+
+            # Max-heap of (-priority, state), stale entries are skipped when popped
+            priorities = [0.0] * len(utilities)
+            heap = []
+            for s, priority in zip(live.tolist(), bellman_errors[live].tolist()):
+                priorities[s] = priority
+                if priority >= theta:
+                    heap.append((-priority, s))
+            heapq.heapify(heap)
+
+            while heap:
+                priority, s = heapq.heappop(heap)
+                priority = -priority
+                if priority != priorities[s]:
+                    continue
+                # If the largest bound on the Bellman errors < theta, the utilities have converged
+                if priority < theta:
+                    break
+
+                value, change = self._get_bellman_error(utilities, s)
+                utilities[s] = value
+                priorities[s] = 0.0
+                backups += 1
+
+                # Only the Bellman errors of the predecessors of s depend on U(s)
+                change *= self.discount
+                for p, probability in predecessors[s]:
+                    p_priority = priorities[p] + probability * change
+                    priorities[p] = p_priority
+                    if p_priority >= theta:
+                        heapq.heappush(heap, (-p_priority, p))
+
+        self.backups += backups
+        self.utilities = np.array(utilities, dtype=self.dtype).reshape(self.height, self.width)
+        self.prev_utilities = self.utilities.copy()
+        with self._time_phase("improvement"):
+            self._set_policy(np.argmax(self.transitions.expected_utilities(self.utilities, dtype=self._compute_dtype), axis=0))
+
+        # Add data to plot
+        self._record_history()
+        self._end_iteration()
+
+        print(f"Prioritized Sweeping took {backups} backups to converge")
+        return backups
+
+class PolicyIteration(MDP):
+    # Minimum gain in expected utility for a state to switch action during policy improvement
+    IMPROVEMENT_TOLERANCE = 1e-9
+
+    def __init__(self, layout:Union[List[List[State]], Maze], discount:float, history:Union[bool, UtilityHistory]=False,
+                 stats:Union[bool, SolverStats]=False, precision:str="float64", absorbing:bool=False):
+        super().__init__(layout, discount, history, stats, precision, absorbing)
+
+        # Policy evaluation system kept between iterations for warm starts
+        self._system_actions = None
+        self._system_columns = self._system_probabilities = None
+
+    def _invalidate_caches(self):
+        super()._invalidate_caches()
+        self._system_actions = None
+        self._system_columns = self._system_probabilities = None
+
+    def _assemble_system(self, actions:np.ndarray):
+        """
+        Assembles the transitions of the policy evaluation system. If a system has already been
+        assembled, only the rows of the states whose action has changed are re-assembled.
+
+        Args:
+            actions (np.ndarray): The action code of every state
+        """
+        live = self.transitions.live
+        if self._system_actions is None:
+            self._system_columns, self._system_probabilities = self.transitions.policy_transitions(actions)
+        else:
+            rows = np.flatnonzero(actions.ravel()[live] != self._system_actions.ravel()[live])
+            if len(rows):
+                columns, probabilities = self.transitions.policy_transitions(actions, rows)
+                self._system_columns[rows] = columns
+                # Without absorbing states, the probabilities are the same for every row
+                if self.absorbing:
+                    self._system_probabilities[rows] = probabilities
+        self._system_actions = actions
+        return self._system_columns, self._system_probabilities
+
+    def _policy_evaluation(self, method:str="auto", warm_start:bool=False):
+        """
+        Evaluates the policy by solving the sparse system of linear equations
+        U(s) - γ∑P(s'|s,π(s))U(s') = R(s) over the live states. The fixed utilities of absorbing
+        successors are moved to the right-hand side.
 
-        x, _, _, _ = np.linalg.lstsq(a, b, rcond=None)
-        return x.reshape((self.height, self.width))
+        Args:
+            method (str): The linear solver to use, see helper.LinearSolvers.solve_policy_system
+            warm_start (bool): Whether to re-assemble only the rows whose action changed and seed
+                the solver with the current utilities
+        """
+        live = self.transitions.live
+        actions = self._get_policy_actions()
+        if warm_start:
+            columns, probabilities = self._assemble_system(actions)
+            x0 = self.utilities.ravel()[live].astype(np.float64)
+        else:
+            columns, probabilities = self.transitions.policy_transitions(actions)
+            x0 = None
+        x = solve_policy_system(columns, probabilities, self._get_policy_rewards(actions), self.discount,
+                                method=method, x0=x0, colours=self.transitions.live_colours)
+
+        utilities = self._fixed_utilities.copy()
+        utilities.ravel()[live] = x
+        return utilities
 
-    def solve(self):
+    def solve(self, method:str="auto", warm_start:bool=False):
         """
         Finds the optimum policy and estimated utilities of the MDP
+
+        Args:
+            method (str): The linear solver used for policy evaluation, "direct" (requires scipy),
+                "bicgstab" (requires scipy), "jacobi", "gauss-seidel" or "auto". With "auto", warm
+                starts use an iterative solver and cold starts use the direct solver when available.
+            warm_start (bool): Whether to evaluate each policy iteratively, starting from the
+                utilities of the previous policy and re-assembling only the rows whose action changed
         """
+        if method == "auto" and warm_start:
+            method = "bicgstab" if HAS_SCIPY else "gauss-seidel"
+
         iteration = 0
         while True:
             iteration += 1
-            self.utilities = self.prev_utilities = self._policy_evaluation()
-            unchanged = True
-            for i in range(self.height):
-                for j in range(self.width):
-                    state = self.layout[i][j]
-                    # Ignore state if state is a wall
-                    if state.is_wall:
-                        continue
-
-                    # Find best action by calculating Q(s,a) for each action
-                    max_utility = float('-inf')
-                    best_action = action = Direction.LEFT
-
-                    # Try all four possible actions
-                    for _ in range(4):
-                        utility = self._get_expected_utilty(i, j, action)
-                        if utility > max_utility:
-                            max_utility = utility
-                            best_action = action
-                        action = action.rotate_clockwise()
-                    
-                    # If best action is different from current action, set unchanged to False
-                    if best_action != self.policy[i][j]:
-                        self.policy[i][j] = best_action
-                        unchanged = False
+            with self._time_phase("evaluation"):
+                utilities = self._policy_evaluation(method, warm_start)
+            # Every evaluation solves for the utility of every live state once
+            self.backups += len(self.transitions.live)
+            delta = np.abs(utilities - self.utilities).max()
+            self.utilities = self.prev_utilities = utilities
+
+            # If the best action is better than the current action of any state, the policy changes.
+            # Near-ties are ignored so that solver round-off cannot flip the policy forever
+            with self._time_phase("improvement"):
+                changes = self._improve_policy(self.IMPROVEMENT_TOLERANCE)
             
             # Add data to plot
-            self.utility_plotter.add_data(self.utilities, self.layout)
+            self._record_history()
+            self._end_iteration(delta, changes)
 
-            if unchanged:
+            if changes == 0:
                 break
         
-        print(f"Policy Iteration took {iteration} iterations to converge")
+        print(f"Policy Iteration took {iteration} iterations ({self.backups} backups) to converge")
         return iteration
 
 class ModifiedPolicyIteration(MDP):
-    def _policy_evaluation(self, k:int):
+    # Bounds and policy change thresholds of the number of evaluation sweeps in adaptive mode
+    MIN_K = 1
+    MAX_K = 1000
+    GROW_K_CHANGES = 0.01
+    SHRINK_K_CHANGES = 0.2
+
+    def _policy_evaluation(self, k:int, asynchronous:bool=False, order:str="row-major", workers:int=1, tolerance:float=None):
         """
         Evaluates the policy approximately to give a reasonably good approximation of the utilities
 
         Args:
             k (int): The number of iterations of Bellman update
+            asynchronous (bool): Whether to update the utilities in place, one group of states
+                (e.g. one row) at a time
+            order (str): The sweep order of asynchronous updates, one of SWEEP_ORDERS, see ValueIteration.solve
+            workers (int): The number of threads sharing each synchronous sweep, one band of rows each
+            tolerance (float): Stop before k sweeps once a sweep changes no utility by more than this
+
+        Returns:
+            float: The maximum change of utility in the last sweep
         """
-        for _ in range(k):
-            delta = 0.0
-            
-            # Iterate through each state in the maze
-            for i in range(self.height):
-                for j in range(self.width):
-                    state = self.layout[i][j]
-                    # Ignore state if state is a wall
-                    if state.is_wall:
-                        continue
-
-                    action = self.policy[i][j]
-                    self.utilities[i][j] = state.reward + self.discount * self._get_expected_utilty(i, j, action)
-        
-                    # Update maximum delta
-                    delta = max(delta, abs(self.utilities[i][j] - self.prev_utilities[i][j]))
-            
-            # Updates the value of each state synchronously
-            self._update_prev_values()
+        actions = self._get_policy_actions()
+        delta = 0.0
+        if asynchronous:
+            # The actions are fixed during the evaluation, so the groups of every order are restricted once
+            policy_groups = {}
+            for _ in range(k):
+                sweep_order = self._resolve_sweep_order(order)
+                if sweep_order not in policy_groups:
+                    policy_groups[sweep_order] = self._get_policy_groups(self._get_sweep_groups(sweep_order), actions)
+                delta = self._sweep_in_place(policy_groups[sweep_order])
+                if tolerance is not None and delta < tolerance:
+                    break
+            self.prev_utilities = self.utilities.copy()
+            return delta
+
+        bands = self._get_bands(workers)
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for _ in range(k):
+                delta = self._sweep_bands(bands, executor, actions)
+
+                # Updates the value of each state synchronously by swapping the buffers
+                self.utilities, self.prev_utilities = self.prev_utilities, self.utilities
+                # Stopping the evaluation early does not decide the error of the result, no need to warn
+                if tolerance is not None and self._has_converged(delta, tolerance, warn=False):
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # The newest utilities are in the previous utilities after the last swap
+        np.copyto(self.utilities, self.prev_utilities)
+        return delta
     
-    def solve(self, k:int):
+    def _get_bellman_residual(self, expected:np.ndarray):
+        """
+        Calculates max|R(s) + γ max_a ∑P(s'|s,a)U(s') - U(s)| - the largest change of utility a
+        value iteration update of the previous utilities would make
+
+        Args:
+            expected (np.ndarray): The expected utilities of the previous utilities
+        """
+        residual = expected.max(axis=0)
+        residual *= self.discount
+        residual += self.rewards
+        residual -= self.prev_utilities
+        return np.abs(residual[~self._fixed]).max(initial=0.0)
+
+    def _adapt_k(self, k:int, changes:int):
+        """
+        Chooses the number of evaluation sweeps of the next iteration from the number of policy
+        changes of the last one. While the policy changes a lot, the evaluation of each policy is
+        mostly wasted, so k shrinks. Once the policy settles, k grows so that the utilities converge.
+        """
+        fraction = changes / max(len(self.transitions.live), 1)
+        if fraction <= self.GROW_K_CHANGES:
+            return min(2 * k, self.MAX_K)
+        if fraction >= self.SHRINK_K_CHANGES:
+            return max(k // 2, self.MIN_K)
+        return k
+
+    def solve(self, k:int, asynchronous:bool=False, order:str="row-major", workers:int=1,
+              error:float=None, tolerance:float=None, adaptive:bool=False):
         """
         Finds the optimum policy and estimated utilities of the MDP
 
         Args:
-            error (float): The number of iterations of Bellman update for policy evaluation
+            k (int): The number of iterations of Bellman update for policy evaluation, the
+                maximum number of iterations if a tolerance is given, or the initial one if adaptive
+            asynchronous (bool): Whether policy evaluation updates the utilities in place
+            order (str): The sweep order of asynchronous updates, one of SWEEP_ORDERS, see ValueIteration.solve
+            workers (int): The number of threads sharing each synchronous sweep of policy evaluation
+            error (float): If given, terminate once the utilities are within this error of the
+                optimum utilities, as in value iteration, instead of once the policy stops changing
+            tolerance (float): Stop each policy evaluation early once a sweep changes no utility by
+                more than this. Defaults to the termination threshold if an error is given.
+            adaptive (bool): Whether to adapt k to the number of policy changes of the last iteration
         """
+        theta = None if error is None else error * (1 - self.discount) / self.discount
+        if tolerance is None:
+            tolerance = theta
+
         iteration = 0
         while True:
             iteration += 1
-            self._policy_evaluation(k)
-            unchanged = True
-            for i in range(self.height):
-                for j in range(self.width):
-                    state = self.layout[i][j]
-                    # Ignore state if state is a wall
-                    if state.is_wall:
-                        continue
-
-                    # Find best action by calculating Q(s,a) for each action
-                    max_utility = float('-inf')
-                    best_action = action = Direction.LEFT
-
-                    # Try all four possible actions
-                    for _ in range(4):
-                        utility = self._get_expected_utilty(i, j, action)
-                        if utility > max_utility:
-                            max_utility = utility
-                            best_action = action
-                        action = action.rotate_clockwise()
-                    
-                    # If best action is different from current action, set unchanged to False
-                    if best_action != self.policy[i][j]:
-                        self.policy[i][j] = best_action
-                        unchanged = False
+            with self._time_phase("evaluation"):
+                delta = self._policy_evaluation(k, asynchronous, order, workers, tolerance)
+            # If the best action of any state is different from its current action, the policy changes
+            with self._time_phase("improvement"):
+                expected = self._get_expected_utilities()
+                changes = self._improve_policy(expected=expected)
             
             # Add data to plot
-            self.utility_plotter.add_data(self.utilities, self.layout)
+            self._record_history()
+            self._end_iteration(delta, changes)
 
+            if theta is not None:
+                # If the Bellman residual < theta, the utilities are within the error of the optimum
+                if self._has_converged(self._get_bellman_residual(expected), theta):
+                    break
             # If policy has converged, exit algorithm
-            if unchanged:
+            elif changes == 0:
                 break
+
+            if adaptive:
+                k = self._adapt_k(k, changes)
         
-        print(f"Modified Policy Iteration took {iteration} iterations to converge")
-        return iteration
\ No newline at end of file
+        print(f"Modified Policy Iteration took {iteration} iterations ({self.backups} backups) to converge")
+        return iteration
+
+
+# Solvers by algorithm name, as used by helper.BatchSolver, SolveCache and the benchmark
+SOLVERS = {
+    "value_iteration": ValueIteration,
+    "policy_iteration": PolicyIteration,
+    "modified_policy_iteration": ModifiedPolicyIteration,
+    "prioritized_sweeping": PrioritizedSweeping,
+}
@@ -0,0 +1,77 @@
+from typing import List, Union
+import numpy as np
+from classes.States import State
+
+
+class Maze:
+    """
+    A maze stored as contiguous arrays instead of a grid of State objects
+
+    Attributes:
+        rewards (np.ndarray): The reward of every state, float64 of shape (height, width)
+        walls (np.ndarray): 1 where the state is a wall, uint8 of shape (height, width)
+        terminals (np.ndarray): 1 where the state is terminal, uint8 of shape (height, width)
+    """
+    def __init__(self, rewards:np.ndarray, walls:np.ndarray=None, terminals:np.ndarray=None):
+        self.rewards = np.ascontiguousarray(rewards, dtype=np.float64)
+        if self.rewards.ndim != 2:
+            raise ValueError(f"Expected 2D rewards, got shape {self.rewards.shape}.")
+        self.walls = self._as_mask(walls)
+        self.terminals = self._as_mask(terminals)
+
+    def _as_mask(self, mask:np.ndarray):
+        if mask is None:
+            return np.zeros(self.rewards.shape, dtype=np.uint8)
+        mask = np.ascontiguousarray(mask, dtype=np.uint8)
+        if mask.shape != self.rewards.shape:
+            raise ValueError(f"Expected a mask of shape {self.rewards.shape}, got {mask.shape}.")
+        return mask
+
+    @property
+    def height(self) -> int:
+        return self.rewards.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.rewards.shape[1]
+
+    @property
+    def shape(self):
+        return self.rewards.shape
+
+    def __eq__(self, other):
+        if not isinstance(other, Maze):
+            return NotImplemented
+        return np.array_equal(self.rewards, other.rewards) and np.array_equal(self.walls, other.walls) and \
+            np.array_equal(self.terminals, other.terminals)
+
+    @classmethod
+    def from_layout(cls, layout:Union[List[List[State]], "Maze"]) -> "Maze":
+        """
+        Converts a grid of State objects into a Maze. Mazes are returned unchanged.
+
+        Args:
+            layout (List[List[State]]): The maze layout, e.g. from get_q1_maze or generate_random_maze
+
+        Returns:
+            Maze: The maze
+        """
+        if isinstance(layout, Maze):
+            return layout
+        return cls(
+            rewards=[[state.reward for state in row] for row in layout],
+            walls=[[state.is_wall for state in row] for row in layout],
+            terminals=[[state.is_terminal for state in row] for row in layout],
+        )
+
+    def to_layout(self) -> List[List[State]]:
+        """
+        Converts the maze back into a grid of State objects
+
+        Returns:
+            List[List[State]]: The maze layout
+        """
+        return [
+            [State(reward=reward, is_terminal=bool(terminal), is_wall=bool(wall)) for reward, wall, terminal in zip(*row)]
+            for row in zip(self.rewards.tolist(), self.walls.tolist(), self.terminals.tolist())
+        ]
@@ -0,0 +1,106 @@
+from typing import Dict, Iterator, List, Tuple, Union
+import json
+import os
+from classes.States import State
+from classes.Maze import Maze
+from helper.MazeFiles import save_maze, load_maze, save_solution, load_solution
+
+
+class MazeDatasetWriter:
+    """
+    Streams many mazes, and optionally their solutions, to a dataset directory. Every maze is
+    written to its own numbered subdirectory with helper.MazeFiles.save_maze, and one line per maze
+    is appended to index.jsonl, so mazes can be written one at a time without keeping them in
+    memory. Writing to an existing dataset appends to it.
+    """
+    def __init__(self, directory:str):
+        """
+        Args:
+            directory (str): The directory of the dataset, created if needed
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.jsonl")
+        self._count = 0
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                self._count = sum(1 for line in f if line.strip())
+        self._index = open(self._index_path, "a")
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, layout:Union[List[List[State]], Maze], solution:Dict=None, **metadata):
+        """
+        Appends a maze to the dataset
+
+        Args:
+            layout (Union[List[List[State]], Maze]): The maze layout
+            solution (Dict): The solution of the maze, see helper.MazeFiles.save_solution
+            **metadata: JSON-serializable metadata of the maze, e.g. discount=0.99
+
+        Returns:
+            int: The index of the maze in the dataset
+        """
+        index = self._count
+        name = f"{index:06d}"
+        maze = Maze.from_layout(layout)
+        save_maze(os.path.join(self.directory, name), maze, **metadata)
+        if solution is not None:
+            save_solution(os.path.join(self.directory, name), solution)
+
+        # The index line is written last, so readers only see mazes that are complete
+        self._index.write(json.dumps({"index": index, "path": name, "shape": list(maze.shape), "solved": solution is not None}) + "\n")
+        self._index.flush()
+        self._count += 1
+        return index
+
+    def close(self):
+        self._index.close()
+
+
+class MazeDatasetReader:
+    """
+    Reads a dataset written by MazeDatasetWriter. The mazes are loaded lazily, one at a time, with
+    their arrays memory-mapped read-only by default.
+    """
+    def __init__(self, directory:str, mmap_mode:str="r"):
+        """
+        Args:
+            directory (str): The directory of the dataset
+            mmap_mode (str): The memory-map mode of the arrays, see np.load, or None to read them into memory
+        """
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        with open(os.path.join(directory, "index.jsonl")) as f:
+            self.entries:List[Dict] = [json.loads(line) for line in f if line.strip()]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index:int) -> Tuple[Maze, Dict, Dict]:
+        """
+        Returns:
+            Tuple[Maze, Dict, Dict]: The maze, its metadata and its solution (None if not solved)
+        """
+        directory = os.path.join(self.directory, self.entries[index]["path"])
+        maze, metadata = load_maze(directory, self.mmap_mode)
+        return maze, metadata, load_solution(directory, self.mmap_mode)
+
+    def __iter__(self) -> Iterator[Tuple[Maze, Dict, Dict]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def mazes(self) -> Iterator[Maze]:
+        """
+        Yields the mazes only, e.g. as the layouts of helper.BatchSolver.solve_batch
+        """
+        for entry in self.entries:
+            maze, _ = load_maze(os.path.join(self.directory, entry["path"]), self.mmap_mode)
+            yield maze
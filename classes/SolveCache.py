@@ -0,0 +1,231 @@
+from typing import Callable, Dict, List, Union
+import hashlib
+import inspect
+import json
+import numbers
+import os
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from classes.States import State
+from classes.Maze import Maze
+from classes.MDP import SOLVERS
+
+# Constructor options that do not change the result of a solve, left out of the key
+UNKEYED_OPTIONS = ("layout", "discount", "history", "stats")
+
+
+def _normalize_value(value):
+    """
+    Converts a parameter value to a canonical JSON value, so that e.g. k=50, k=50.0 and
+    k=np.int64(50) give the same key
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    return value
+
+def _normalize_arguments(function:Callable, arguments:Dict) -> Dict:
+    """
+    Binds keyword arguments to the signature of a function and fills in the defaults, so that
+    leaving out an argument gives the same key as passing its default
+
+    Raises:
+        TypeError: If the function does not take the arguments
+    """
+    bound = inspect.signature(function).bind_partial(**arguments)
+    bound.apply_defaults()
+    return {name: _normalize_value(value) for name, value in bound.arguments.items() if name not in UNKEYED_OPTIONS}
+
+
+class SolveCache:
+    """
+    Memoizes solves by the content of the maze and the solver parameters, so that re-solving the
+    same layout with the same parameters returns the stored utilities and policy instead of solving again.
+
+    Results are kept in an in-memory LRU tier and, if a directory is given, in an on-disk tier of
+    .npz files that survives between processes. Both tiers are bounded in bytes and evict the least
+    recently used results first. Memory hits return read-only arrays shared with the cache.
+    """
+    def __init__(self, max_bytes:int=256 * 2**20, directory:str=None, max_disk_bytes:int=4 * 2**30):
+        """
+        Args:
+            max_bytes (int): The maximum size of the results kept in memory
+            directory (str): The directory of the on-disk tier, or None to only cache in memory
+            max_disk_bytes (int): The maximum size of the results kept on disk
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._results:"OrderedDict[str, Dict]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_key(layout:Union[List[List[State]], Maze], algorithm:str, discount:float, params:Dict=None, options:Dict=None) -> str:
+        """
+        Hashes the rewards, walls and terminals of a maze together with the solver and its parameters.
+        Numeric values are compared as floats and omitted arguments as their defaults.
+
+        Args:
+            layout (Union[List[List[State]], Maze]): The maze layout
+            algorithm (str): The solver, a key of classes.MDP.SOLVERS
+            discount (float): The discount factor
+            params (Dict): The keyword arguments of the solver's solve method
+            options (Dict): The keyword arguments of the solver's constructor, e.g. {"precision": "float32"}
+
+        Returns:
+            str: The key of the solve
+        """
+        if algorithm not in SOLVERS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {tuple(SOLVERS)}.")
+        solver = SOLVERS[algorithm]
+        maze = Maze.from_layout(layout)
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            "algorithm": algorithm,
+            "discount": _normalize_value(discount),
+            "params": _normalize_arguments(solver.solve, params or {}),
+            "options": _normalize_arguments(solver, options or {}),
+            "shape": maze.shape,
+        }, sort_keys=True).encode())
+        for array in (maze.rewards, maze.walls, maze.terminals):
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __contains__(self, key:str):
+        return key in self._results or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def _path(self, key:str):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key:str) -> Dict:
+        """
+        Looks up a solve in memory, then on disk
+
+        Returns:
+            Dict: The "utilities", "policy" (action codes), "iterations" and "backups" of the solve, or None on a miss
+        """
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return self._results[key]
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            with np.load(self._path(key)) as data:
+                result = {name: data[name] for name in data.files}
+            result["iterations"] = int(result["iterations"])
+            result["backups"] = int(result["backups"])
+            # Mark the file as recently used for the eviction of the disk tier
+            os.utime(self._path(key))
+            self.hits += 1
+            self.disk_hits += 1
+            self._put_in_memory(key, result)
+            return result
+
+        self.misses += 1
+        return None
+
+    def put(self, key:str, result:Dict):
+        """
+        Stores a solve in memory and, if enabled, on disk
+
+        Args:
+            key (str): The key of the solve, see get_key
+            result (Dict): The "utilities", "policy" (action codes), "iterations" and "backups" of the solve
+
+        Returns:
+            Dict: The stored copy of the result
+        """
+        result = {
+            "utilities": np.array(result["utilities"], dtype=np.float64),
+            "policy": np.array(result["policy"], dtype=np.int8),
+            "iterations": int(result["iterations"]),
+            "backups": int(result["backups"]),
+        }
+        if self.directory is not None:
+            # Write to a unique temporary file first, so that concurrent readers never see a partial
+            # file, even if several processes store the same key at once
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **result)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        self._put_in_memory(key, result)
+        return result
+
+    def _put_in_memory(self, key:str, result:Dict):
+        for array in (result["utilities"], result["policy"]):
+            array.setflags(write=False)
+        if key in self._results:
+            self.nbytes -= self._get_size(self._results.pop(key))
+        self._results[key] = result
+        self.nbytes += self._get_size(result)
+        while self.nbytes > self.max_bytes and self._results:
+            _, evicted = self._results.popitem(last=False)
+            self.nbytes -= self._get_size(evicted)
+
+    def _evict_disk(self):
+        """
+        Deletes the least recently used files until the disk tier fits in max_disk_bytes
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+    @staticmethod
+    def _get_size(result:Dict):
+        return result["utilities"].nbytes + result["policy"].nbytes
+
+    def clear(self):
+        """
+        Empties the in-memory tier, the on-disk tier is kept
+        """
+        self._results.clear()
+        self.nbytes = 0
+
+    def solve(self, layout:Union[List[List[State]], Maze], algorithm:str, discount:float, options:Dict=None, **params) -> Dict:
+        """
+        Returns the stored solve of a maze, solving and storing it on a miss
+
+        Args:
+            layout (Union[List[List[State]], Maze]): The maze layout
+            algorithm (str): The solver, a key of classes.MDP.SOLVERS
+            discount (float): The discount factor
+            options (Dict): The keyword arguments of the solver's constructor, e.g. {"absorbing": True}
+            **params: The keyword arguments of the solver's solve method, e.g. error=1e-4
+
+        Returns:
+            Dict: The "utilities", "policy" (action codes), "iterations" and "backups" of the solve
+        """
+        maze = Maze.from_layout(layout)
+        options = options or {}
+        key = self.get_key(maze, algorithm, discount, params, options)
+        result = self.get(key)
+        if result is None:
+            solver = SOLVERS[algorithm](maze, discount=discount, **options)
+            iterations = solver.solve(**params)
+            result = self.put(key, {
+                "utilities": solver.utilities,
+                "policy": solver.policy.copy(),
+                "iterations": iterations,
+                "backups": solver.backups,
+            })
+        return result
@@ -0,0 +1,74 @@
+from typing import Callable, Dict, List
+import time
+from contextlib import contextmanager
+
+
+class SolverStats:
+    """
+    Profiling counters of a solve, recorded when a solver is created with stats=True.
+
+    Attributes:
+        phase_times (Dict[str, float]): The wall time in seconds spent in each phase of the solve,
+            "evaluation" (Bellman backups), "improvement" (choosing the policy) and "history" (recording utilities)
+        iterations (int): The number of iterations recorded
+        backups (List[int]): The total number of single state backups after each iteration
+        deltas (List[float]): The maximum change of utility of each iteration, or None if not computed
+        policy_changes (List[int]): The number of states whose action changed in each iteration, or None if not computed
+    """
+    PHASES = ("evaluation", "improvement", "history")
+
+    def __init__(self, callback:Callable[["SolverStats"], None]=None):
+        """
+        Args:
+            callback (Callable[[SolverStats], None]): Called with the stats at the end of every iteration
+        """
+        self.callback = callback
+        self.phase_times:Dict[str, float] = {phase: 0.0 for phase in self.PHASES}
+        self.iterations = 0
+        self.backups:List[int] = []
+        self.deltas:List[float] = []
+        self.policy_changes:List[int] = []
+
+    @contextmanager
+    def phase(self, name:str):
+        """
+        Adds the wall time spent inside the with block to the given phase
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start_time
+
+    def end_iteration(self, backups:int, delta:float=None, policy_changes:int=None):
+        """
+        Records the counters of an iteration and calls the callback
+
+        Args:
+            backups (int): The total number of backups performed by the solver so far
+            delta (float): The maximum change of utility in the iteration
+            policy_changes (int): The number of states whose action changed in the iteration
+        """
+        self.iterations += 1
+        self.backups.append(backups)
+        self.deltas.append(None if delta is None else float(delta))
+        self.policy_changes.append(policy_changes)
+        if self.callback is not None:
+            self.callback(self)
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.phase_times.values())
+
+    def summary(self) -> Dict:
+        """
+        Returns:
+            Dict: The phase times, iterations, backups, last delta and total policy changes of the solve
+        """
+        return {
+            "phase_times": dict(self.phase_times),
+            "iterations": self.iterations,
+            "backups": self.backups[-1] if self.backups else 0,
+            "last_delta": self.deltas[-1] if self.deltas else None,
+            "policy_changes": sum(changes for changes in self.policy_changes if changes is not None),
+        }
@@ -0,0 +1,182 @@
+from typing import Dict, List, Union
+import json
+import os
+import tempfile
+import numpy as np
+from numpy.lib.format import open_memmap
+from classes.States import State
+from classes.Maze import Maze
+from classes.Transitions import blocked_moves, padded_neighbour_utilities, expected_utilities
+
+
+class TiledValueIteration:
+    """
+    Value iteration for mazes too large to keep in memory. The rewards, walls, utilities and policy
+    are stored in memory-mapped .npy files in a directory, and every sweep processes the maze one
+    tile at a time, reading each tile together with a one-cell halo of its neighbouring tiles.
+    Peak memory is therefore bounded by the tile size rather than the maze size.
+
+    The updates are synchronous, exactly as in ValueIteration, so both solvers have the same fixed point.
+    """
+    def __init__(self, directory:str, discount:float, tile_size:int=1024):
+        """
+        Args:
+            directory (str): The directory holding rewards.npy and walls.npy, e.g. written by
+                helper.MazeFiles.save_maze. The utilities and policy are written to the same directory,
+                in the format of helper.MazeFiles.save_solution. Existing utilities are used as the
+                initial guess.
+            discount (float): The discount factor
+            tile_size (int): The height and width of the tiles
+        """
+        self.directory = directory
+        self.discount = discount
+        self.tile_size = tile_size
+
+        self.rewards = np.load(self._path("rewards"), mmap_mode="r")
+        self.walls = np.load(self._path("walls"), mmap_mode="r")
+        self.height, self.width = self.rewards.shape
+
+        self.utilities = self._open("utilities", np.float64)
+        self.policy = self._open("policy", np.int8)
+
+        self.sweeps = 0
+        self.backups = 0
+
+    @classmethod
+    def from_maze(cls, layout:Union[List[List[State]], Maze], directory:str, discount:float, tile_size:int=1024):
+        """
+        Writes the rewards and walls of a maze to a directory and creates a solver for it
+
+        Args:
+            layout (Union[List[List[State]], Maze]): The maze layout
+            directory (str): The directory to write the memory-mapped files to
+            discount (float): The discount factor
+            tile_size (int): The height and width of the tiles
+
+        Returns:
+            TiledValueIteration: The solver
+        """
+        maze = Maze.from_layout(layout)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "rewards.npy"), maze.rewards)
+        np.save(os.path.join(directory, "walls.npy"), maze.walls)
+        return cls(directory, discount, tile_size=tile_size)
+
+    def _path(self, name:str):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def _open(self, name:str, dtype):
+        path = self._path(name)
+        if os.path.exists(path):
+            array = open_memmap(path, mode="r+")
+            if array.shape == self.rewards.shape and array.dtype == dtype:
+                return array
+            del array
+        return open_memmap(path, mode="w+", dtype=dtype, shape=self.rewards.shape)
+
+    def _write_solution(self, stats:Dict):
+        """
+        Writes solution.json next to the utilities and policy, so that helper.MazeFiles.load_solution
+        can read the solution
+        """
+        # Write to a unique temporary file first, so that concurrent readers never see a partial file
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(path, os.path.join(self.directory, "solution.json"))
+
+    def _tiles(self):
+        """
+        Yields the (row start, row end, column start, column end) of every tile
+        """
+        for r0 in range(0, self.height, self.tile_size):
+            for c0 in range(0, self.width, self.tile_size):
+                yield r0, min(r0 + self.tile_size, self.height), c0, min(c0 + self.tile_size, self.width)
+
+    def _read_with_halo(self, array:np.ndarray, r0:int, r1:int, c0:int, c1:int, fill):
+        """
+        Reads a tile with a one-cell halo, filling the cells outside of the maze with the given value
+        """
+        tile = np.full((r1 - r0 + 2, c1 - c0 + 2), fill, dtype=array.dtype)
+        top, left = max(r0 - 1, 0), max(c0 - 1, 0)
+        bottom, right = min(r1 + 1, self.height), min(c1 + 1, self.width)
+        tile[top-r0+1:bottom-r0+1, left-c0+1:right-c0+1] = array[top:bottom, left:right]
+        return tile
+
+    def _get_q_values(self, utilities:np.ndarray, r0:int, r1:int, c0:int, c1:int):
+        """
+        Calculates Q(s,a) for every state and action of a tile
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The Q-values of shape (4, tile height, tile width) and the wall mask of the tile
+        """
+        padded_walls = self._read_with_halo(self.walls, r0, r1, c0, c1, fill=1).view(bool)
+        padded_utilities = self._read_with_halo(utilities, r0, r1, c0, c1, fill=0.0)
+        neighbours = padded_neighbour_utilities(padded_utilities, blocked_moves(padded_walls))
+        q_values = expected_utilities(neighbours)
+        q_values *= self.discount
+        q_values += self.rewards[r0:r1, c0:c1]
+        return q_values, padded_walls[1:-1, 1:-1]
+
+    def _sweep(self, source:np.ndarray, target:np.ndarray):
+        """
+        Performs one synchronous Bellman update of every tile from source into target
+
+        Returns:
+            float: The maximum change of utility
+        """
+        delta = 0.0
+        for r0, r1, c0, c1 in self._tiles():
+            q_values, walls = self._get_q_values(source, r0, r1, c0, c1)
+            utilities = q_values.max(axis=0)
+            utilities[walls] = 0.0
+            delta = max(delta, np.abs(utilities - source[r0:r1, c0:c1]).max())
+            target[r0:r1, c0:c1] = utilities
+            self.backups += int(np.count_nonzero(~walls))
+        self.sweeps += 1
+        return delta
+
+    def solve(self, error:float):
+        """
+        Finds the optimum policy and estimated utilities of the MDP
+
+        Args:
+            error (float): The threshold to terminate the value iteration algorithm
+
+        Returns:
+            int: The number of iterations
+        """
+        theta = error * (1 - self.discount) / self.discount
+        # Scratch buffer for the synchronous updates, removed once solved
+        scratch = self._open("prev_utilities", np.float64)
+        source, target = self.utilities, scratch
+        iteration = 0
+
+        while True:
+            iteration += 1
+            delta = self._sweep(source, target)
+            source, target = target, source
+
+            # If delta < theta, the policy has converged and we terminate the evaluation
+            if delta < theta:
+                break
+
+        # The policy is the best action of the last update, which was made from target
+        for r0, r1, c0, c1 in self._tiles():
+            q_values, _ = self._get_q_values(target, r0, r1, c0, c1)
+            self.policy[r0:r1, c0:c1] = np.argmax(q_values, axis=0)
+
+        # Make sure the newest utilities end up in utilities.npy by swapping the buffers tile by tile
+        if source is not self.utilities:
+            for r0, r1, c0, c1 in self._tiles():
+                newest = source[r0:r1, c0:c1].copy()
+                source[r0:r1, c0:c1] = target[r0:r1, c0:c1]
+                target[r0:r1, c0:c1] = newest
+        self.utilities.flush()
+        self.policy.flush()
+        del scratch, source, target
+        os.remove(self._path("prev_utilities"))
+        self._write_solution({"discount": self.discount, "iterations": iteration, "backups": self.backups})
+
+        print(f"Tiled Value Iteration took {iteration} iterations ({self.backups} backups) to converge")
+        return iteration
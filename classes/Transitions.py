@@ -0,0 +1,318 @@
+from typing import Tuple
+import numpy as np
+from classes.Direction import Direction
+
+# Probabilities of the intended, anticlockwise and clockwise outcomes of an action
+OUTCOME_PROBABILITIES = np.array([0.8, 0.1, 0.1])
+# Rotation applied to the action code for each outcome, in the same order
+OUTCOME_ROTATIONS = (0, -1, 1)
+
+
+def blocked_moves(padded_walls:np.ndarray) -> np.ndarray:
+    """
+    Finds the moves that leave the agent in place because of a wall or the edge of the maze
+
+    Args:
+        padded_walls (np.ndarray): The wall mask with a one-cell halo, of shape (..., height + 2, width + 2).
+            Cells outside of the maze should be marked as walls.
+
+    Returns:
+        np.ndarray: Boolean mask of shape (4, ..., height, width), indexed by action code
+    """
+    height, width = padded_walls.shape[-2] - 2, padded_walls.shape[-1] - 2
+    walls = padded_walls[..., 1:height+1, 1:width+1]
+    blocked = np.empty((len(Direction.ACTIONS),) + walls.shape, dtype=bool)
+    for a, direction in enumerate(Direction.ACTIONS):
+        di, dj = direction.vector
+        np.logical_or(padded_walls[..., 1+di:height+1+di, 1+dj:width+1+dj], walls, out=blocked[a])
+    return blocked
+
+def neighbour_utilities(utilities:np.ndarray, blocked:np.ndarray) -> np.ndarray:
+    """
+    Finds the utility of the state reached by moving in each direction, from shifted copies of the utility grid
+
+    Args:
+        utilities (np.ndarray): The utilities of all states, of shape (..., height, width)
+        blocked (np.ndarray): The blocked moves, of shape (4, ..., height, width)
+
+    Returns:
+        np.ndarray: The utility of the state reached by each move, of shape (4, ..., height, width)
+    """
+    pad_width = [(0, 0)] * (utilities.ndim - 2) + [(1, 1), (1, 1)]
+    return padded_neighbour_utilities(np.pad(utilities, pad_width), blocked)
+
+def padded_neighbour_utilities(padded_utilities:np.ndarray, blocked:np.ndarray) -> np.ndarray:
+    """
+    Same as neighbour_utilities, for utilities that already have a one-cell halo, e.g. a tile of a
+    larger grid together with the neighbouring cells of the adjacent tiles
+
+    Args:
+        padded_utilities (np.ndarray): The utilities with a one-cell halo, of shape (..., height + 2, width + 2)
+        blocked (np.ndarray): The blocked moves of the inner cells, of shape (4, ..., height, width)
+
+    Returns:
+        np.ndarray: The utility of the state reached by each move, of shape (4, ..., height, width)
+    """
+    height, width = padded_utilities.shape[-2] - 2, padded_utilities.shape[-1] - 2
+    utilities = padded_utilities[..., 1:height+1, 1:width+1]
+    neighbours = np.empty((len(Direction.ACTIONS),) + utilities.shape, dtype=utilities.dtype)
+    for a, direction in enumerate(Direction.ACTIONS):
+        di, dj = direction.vector
+        neighbours[a] = np.where(blocked[a], utilities, padded_utilities[..., 1+di:height+1+di, 1+dj:width+1+dj])
+    return neighbours
+
+def expected_utilities(neighbours:np.ndarray) -> np.ndarray:
+    """
+    Combines the utilities reached by each move into ∑P(s'|s,a)U(s') for every action
+
+    Args:
+        neighbours (np.ndarray): The utility reached by each move, of shape (4, ...), indexed by action code
+
+    Returns:
+        np.ndarray: The expected utilities, of shape (4, ...), indexed by action code, of the same dtype as the neighbours
+    """
+    # The unintended outcomes of action a are the moves a - 1 (anticlockwise) and a + 1 (clockwise)
+    n_actions = len(neighbours)
+    probabilities = OUTCOME_PROBABILITIES.astype(neighbours.dtype, copy=False)
+    value = probabilities[0] * neighbours
+    # Scale one action at a time, so that no other (4, ...) temporary is allocated
+    scaled = np.empty_like(neighbours[0])
+    for probability, rotation in zip(probabilities[1:], OUTCOME_ROTATIONS[1:]):
+        for a in range(n_actions):
+            np.multiply(neighbours[(a + rotation) % n_actions], probability, out=scaled)
+            value[a] += scaled
+    return value
+
+class TransitionModel:
+    """
+    Compiled transition model of a maze.
+
+    The successor of every (action, outcome, state) triple is resolved once, so the
+    solvers never have to re-derive the 0.8/0.1/0.1 outcomes or re-check walls and
+    bounds. States are indexed in row-major order, i.e. state (i, j) has index
+    i * width + j. Successors of walls are the walls themselves. State indices are stored
+    as int32, and the successors are only built when first needed, as the grid sweeps of
+    value iteration only use the blocked moves.
+
+    Absorbing states (e.g. terminal states) end the episode once entered. Like walls, they are
+    not part of the live states, whose utilities the solvers have to find.
+    """
+    def __init__(self, walls:np.ndarray, absorbing:np.ndarray=None):
+        """
+        Args:
+            walls (np.ndarray): The wall mask, of shape (height, width)
+            absorbing (np.ndarray): The mask of the absorbing states, none if not given
+        """
+        self.walls = np.asarray(walls, dtype=bool)
+        self.absorbing = None if absorbing is None else np.asarray(absorbing, dtype=bool)
+        self.height, self.width = self.walls.shape
+        self.n_states = self.height * self.width
+        self.probabilities = OUTCOME_PROBABILITIES
+
+        # Whether moving in each direction is blocked by a wall or the edge of the maze,
+        # in which case the agent stays in the same state
+        self.blocked = blocked_moves(np.pad(self.walls, 1, constant_values=True))
+
+        # Index of the state reached by moving in each direction
+        self.moves = np.empty((len(Direction.ACTIONS), self.n_states), dtype=np.int32)
+        states = np.arange(self.n_states, dtype=np.int32).reshape(self.height, self.width)
+        for a, direction in enumerate(Direction.ACTIONS):
+            di, dj = direction.vector
+            neighbours = np.roll(states, (-di, -dj), axis=(0, 1))
+            self.moves[a] = np.where(self.blocked[a], states, neighbours).ravel()
+        self._successors = None
+
+        self.live_index = np.full(self.n_states, -1, dtype=np.int32)
+        self._index_live_states()
+
+    @property
+    def successors(self) -> np.ndarray:
+        """
+        The successor of every state for each outcome of each action, built on first access
+
+        Returns:
+            np.ndarray: The successors, int32 of shape (4, 3, n_states), where successors[a, o] holds the
+                successor of every state for outcome o of action a
+        """
+        if self._successors is None:
+            n_actions = len(Direction.ACTIONS)
+            self._successors = np.empty((n_actions, len(OUTCOME_ROTATIONS), self.n_states), dtype=np.int32)
+            self._update_successors(np.arange(self.n_states))
+        return self._successors
+
+    def _update_successors(self, states:np.ndarray):
+        n_actions = len(Direction.ACTIONS)
+        for a in range(n_actions):
+            for o, rotation in enumerate(OUTCOME_ROTATIONS):
+                self._successors[a, o, states] = self.moves[(a + rotation) % n_actions, states]
+
+    def _index_live_states(self):
+        """
+        Indexes the live states, i.e. the states that are neither walls nor absorbing, compactly
+        """
+        inactive = self.walls if self.absorbing is None else self.walls | self.absorbing
+        self.live = np.flatnonzero(~inactive.ravel()).astype(np.int32)
+        self.live_index.fill(-1)
+        self.live_index[self.live] = np.arange(len(self.live))
+        # Checkerboard colour of the live states, every move changes the colour
+        self.live_colours = ((self.live // self.width + self.live % self.width) % 2).astype(np.int8)
+
+    def expected_utilities(self, utilities:np.ndarray, rows:Tuple[int, int]=None, columns:Tuple[int, int]=None,
+                           dtype=None) -> np.ndarray:
+        """
+        Calculates ∑P(s'|s,a)U(s') for every state and action at once
+
+        Args:
+            utilities (np.ndarray): The utilities of all states, of shape (height, width)
+            rows (Tuple[int, int]): The start and end of a band of rows to calculate the expected
+                utilities of, all rows if not given. Only the band and its one-cell halo are read.
+            columns (Tuple[int, int]): The start and end of a band of columns, all columns if not given
+            dtype: The floating point type to calculate in, the dtype of the utilities if not given
+
+        Returns:
+            np.ndarray: The expected utilities, of shape (4, height, width) or (4, band height, band width),
+                indexed by action code
+        """
+        dtype = dtype or utilities.dtype
+        if rows is None and columns is None:
+            return expected_utilities(neighbour_utilities(utilities.astype(dtype, copy=False), self.blocked))
+
+        r0, r1 = rows or (0, self.height)
+        c0, c1 = columns or (0, self.width)
+        top, bottom = max(r0 - 1, 0), min(r1 + 1, self.height)
+        left, right = max(c0 - 1, 0), min(c1 + 1, self.width)
+        padded = np.zeros((r1 - r0 + 2, c1 - c0 + 2), dtype=dtype)
+        padded[top-r0+1:bottom-r0+1, left-c0+1:right-c0+1] = utilities[top:bottom, left:right]
+        return expected_utilities(padded_neighbour_utilities(padded, self.blocked[:, r0:r1, c0:c1]))
+
+    def update_walls(self, walls:np.ndarray, cells:np.ndarray, absorbing:np.ndarray=None):
+        """
+        Updates the model after the wall status of some cells changed. Only the moves of the
+        changed cells and their neighbours are re-derived.
+
+        Args:
+            walls (np.ndarray): The new wall mask, of shape (height, width)
+            cells (np.ndarray): The row-major indices of the cells whose wall status changed
+            absorbing (np.ndarray): The new mask of the absorbing states, if the model has absorbing states
+        """
+        self.walls = np.asarray(walls, dtype=bool)
+        if absorbing is not None:
+            self.absorbing = np.asarray(absorbing, dtype=bool)
+        cells = np.asarray(cells, dtype=np.intp)
+        if len(cells) == 0:
+            self._index_live_states()
+            return
+
+        # The moves of a cell depend on the walls of the cell and of its four neighbours
+        rows, cols = np.divmod(cells, self.width)
+        affected = [cells]
+        for direction in Direction.ACTIONS:
+            di, dj = direction.vector
+            i, j = rows + di, cols + dj
+            inside = (i >= 0) & (i < self.height) & (j >= 0) & (j < self.width)
+            affected.append(i[inside] * self.width + j[inside])
+        states = np.unique(np.concatenate(affected))
+        rows, cols = np.divmod(states, self.width)
+
+        padded_walls = np.pad(self.walls, 1, constant_values=True)
+        for a, direction in enumerate(Direction.ACTIONS):
+            di, dj = direction.vector
+            blocked = padded_walls[rows + 1, cols + 1] | padded_walls[rows + 1 + di, cols + 1 + dj]
+            self.blocked[a, rows, cols] = blocked
+            self.moves[a, states] = np.where(blocked, states, states + di * self.width + dj)
+        if self._successors is not None:
+            self._update_successors(states)
+        self._index_live_states()
+
+    def policy_transitions(self, actions:np.ndarray, rows:np.ndarray=None):
+        """
+        Assembles P(s'|s,π(s)) over the live states in sparse form. Every row has exactly one
+        entry per outcome, so the matrix is stored as fixed-width column and probability arrays.
+        Repeated columns in a row (e.g. two blocked outcomes) are meant to be summed. Outcomes
+        that enter an absorbing state get a probability of 0, see absorbed_utilities.
+
+        Args:
+            actions (np.ndarray): The action code of every state, of shape (height, width)
+            rows (np.ndarray): The compact indices of the rows to assemble, all rows if not given
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The columns and probabilities, both of shape (n_rows, 3),
+                with columns given in the compact indexing over live states
+        """
+        states = self.live if rows is None else self.live[rows]
+        columns = self.live_index[self.successors[np.asarray(actions).ravel()[states], :, states]]
+        if self.absorbing is None:
+            return columns, np.broadcast_to(self.probabilities, columns.shape)
+
+        # Successors of live states are never walls, so the other successors are absorbing
+        absorbed = columns < 0
+        columns[absorbed] = self.live_index[np.broadcast_to(states[:, None], columns.shape)[absorbed]]
+        probabilities = np.where(absorbed, 0.0, self.probabilities)
+        return columns, probabilities
+
+    def absorbed_utilities(self, actions:np.ndarray, utilities:np.ndarray):
+        """
+        Calculates ∑P(s'|s,π(s))U(s') over the absorbing successors s' of every live state, the part
+        of the expected utility left out of policy_transitions
+
+        Args:
+            actions (np.ndarray): The action code of every state, of shape (height, width)
+            utilities (np.ndarray): The utilities of all states, of shape (height, width)
+
+        Returns:
+            np.ndarray: The expected utility of the absorbing successors of every live state
+        """
+        if self.absorbing is None:
+            return np.zeros(len(self.live))
+        successors = self.successors[np.asarray(actions).ravel()[self.live], :, self.live]
+        absorbed = self.absorbing.ravel()[successors]
+        return (np.where(absorbed, np.asarray(utilities, dtype=np.float64).ravel()[successors], 0.0) * self.probabilities).sum(axis=1)
+
+    def distances_from(self, sources:np.ndarray) -> np.ndarray:
+        """
+        Finds the number of moves from the nearest source to every non-wall state with a breadth-first search
+
+        Args:
+            sources (np.ndarray): Boolean mask of the source states, of shape (height, width)
+
+        Returns:
+            np.ndarray: The distance of every state, infinite if the state cannot be reached
+        """
+        distances = np.full(self.n_states, np.inf)
+        frontier = np.flatnonzero(np.asarray(sources).ravel() & ~self.walls.ravel())
+        distance = 0
+        while len(frontier):
+            distances[frontier] = distance
+            distance += 1
+            neighbours = np.unique(self.moves[:, frontier])
+            frontier = neighbours[distances[neighbours] == np.inf]
+        return distances.reshape(self.height, self.width)
+
+    def predecessors(self):
+        """
+        Finds the states from which each state can be reached in one move, including itself if
+        the agent can stay in place there, together with the largest probability max_a P(s|p,a)
+        of reaching the state from each predecessor p
+
+        Returns:
+            List[List[Tuple[int, float]]]: The (predecessor, probability) pairs of every state in
+                row-major indexing
+        """
+        n_actions, n_outcomes, _ = self.successors.shape
+        shape = (n_actions, n_outcomes, len(self.live))
+        targets = self.successors[:, :, self.live].ravel()
+        sources = np.broadcast_to(self.live, shape).ravel()
+        actions = np.broadcast_to(np.arange(n_actions)[:, None, None], shape).ravel()
+        probabilities = np.broadcast_to(self.probabilities[None, :, None], shape).ravel()
+
+        # Sum the outcomes of an action that reach the same state, then take the largest action
+        triples, inverse = np.unique(np.stack([targets, sources, actions], axis=1), axis=0, return_inverse=True)
+        action_probabilities = np.bincount(inverse.ravel(), probabilities)
+        pairs, inverse = np.unique(triples[:, :2], axis=0, return_inverse=True)
+        pair_probabilities = np.zeros(len(pairs))
+        np.maximum.at(pair_probabilities, inverse.ravel(), action_probabilities)
+
+        predecessors = [[] for _ in range(self.n_states)]
+        for (target, source), probability in zip(pairs.tolist(), pair_probabilities.tolist()):
+            predecessors[target].append((source, probability))
+        return predecessors
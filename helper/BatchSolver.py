@@ -0,0 +1,83 @@
+from typing import Dict, Iterable, Iterator, List, Union
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from classes.States import State
+from classes.Maze import Maze
+from classes.MDP import SOLVERS
+
+
+def _solve_maze(layout_index:int, config_index:int, maze:Maze, config:Dict):
+    """
+    Solves a single maze in a worker process
+
+    Returns:
+        Dict: The result of the solve, see solve_batch
+    """
+    config = dict(config)
+    algorithm = config.pop("algorithm")
+    discount = config.pop("discount")
+    precision = config.pop("precision", "float64")
+    absorbing = config.pop("absorbing", False)
+
+    start_time = time.perf_counter()
+    solver = SOLVERS[algorithm](maze, discount=discount, precision=precision, absorbing=absorbing)
+    iterations = solver.solve(**config)
+    total_time = time.perf_counter() - start_time
+
+    return {
+        "layout_index": layout_index,
+        "config_index": config_index,
+        "algorithm": algorithm,
+        "utilities": solver.utilities,
+        "policy": solver.policy.copy(),
+        "iterations": iterations,
+        "backups": solver.backups,
+        "time": total_time,
+    }
+
+def solve_batch(layouts:Iterable[Union[List[List[State]], Maze]], configs:List[Dict], max_workers:int=None, max_in_flight:int=None) -> Iterator[Dict]:
+    """
+    Solves every layout with every solver config across a pool of worker processes, yielding
+    the results as they complete (not necessarily in order). Layouts are sent to the workers as
+    array-backed Mazes, which are much cheaper to pickle than grids of State objects.
+
+    Args:
+        layouts (Iterable[Union[List[List[State]], Maze]]): The layouts to solve, consumed lazily
+        configs (List[Dict]): The solver configs. Each config holds the "algorithm" (a key of SOLVERS),
+            the "discount", optionally the "precision" and "absorbing" and the keyword arguments of the solver's solve
+            method, e.g. {"algorithm": "value_iteration", "discount": 0.99, "error": 1e-4}
+        max_workers (int): The number of worker processes, defaults to the number of CPUs
+        max_in_flight (int): The maximum number of submitted but unfinished solves, which bounds
+            the peak memory. Defaults to twice the number of workers.
+
+    Yields:
+        Dict: The "layout_index", "config_index", "algorithm", "utilities", "policy" (action codes),
+            "iterations", "backups" and "time" (seconds) of each solve
+    """
+    for config in configs:
+        if config.get("algorithm") not in SOLVERS:
+            raise ValueError(f"Unknown algorithm {config.get('algorithm')!r}, expected one of {tuple(SOLVERS)}.")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        jobs = (
+            (layout_index, config_index, maze, config)
+            for layout_index, maze in enumerate(map(Maze.from_layout, layouts))
+            for config_index, config in enumerate(configs)
+        )
+
+        pending = set()
+        for job in jobs:
+            pending.add(executor.submit(_solve_maze, *job))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
@@ -0,0 +1,68 @@
+from typing import Dict, Iterable, List, Union
+import time
+from classes.States import State
+from classes.Maze import Maze
+from classes.MDP import ValueIteration, PolicyIteration
+
+
+def solve_discounts(layout:Union[List[List[State]], Maze], discounts:Iterable[float], error:float,
+                    policy_iteration:bool=False, method:str="auto", absorbing:bool=False) -> List[Dict]:
+    """
+    Solves a maze for a ladder of discount factors, reusing the solution of each discount for the next.
+
+    The discounts are solved in increasing order. The first one is solved by value iteration from
+    zero utilities. Every later one starts from the utilities of the previous discount and is
+    converged by ValueIteration.refine, which alternates a Bellman update with an evaluation of
+    the greedy policy under the new discount. Once the policy has stabilized, the first evaluation
+    already gives nearly the optimum utilities, so only a few updates are needed even for discounts
+    close to 1, where value iteration needs thousands of sweeps from zero utilities.
+
+    All discounts terminate on the same criterion as value iteration with the given error, except
+    the largest one with policy_iteration, which is solved exactly.
+
+    Args:
+        layout (Union[List[List[State]], Maze]): The maze layout
+        discounts (Iterable[float]): The discount factors
+        error (float): The threshold to terminate value iteration, for every discount
+        policy_iteration (bool): Whether to solve the largest discount by policy iteration starting
+            from the policy of the previous discount instead, which is exact and needs few
+            iterations if the policy has stabilized
+        method (str): The linear solver used to evaluate the policies, see
+            helper.LinearSolvers.solve_policy_system. With "auto", BiCGSTAB is used when SciPy is
+            available and Gauss-Seidel otherwise.
+        absorbing (bool): Whether the terminal states are absorbing, see MDP
+
+    Returns:
+        List[Dict]: The "discount", "algorithm", "utilities", "policy" (action codes), "iterations",
+            "backups" and "time" (seconds) of every discount, in increasing order of discount
+    """
+    maze = Maze.from_layout(layout)
+    discounts = sorted(discounts)
+    results = []
+    for i, discount in enumerate(discounts):
+        start_time = time.perf_counter()
+        previous = results[-1] if results else None
+        if previous is not None and policy_iteration and i == len(discounts) - 1:
+            solver = PolicyIteration(maze, discount, absorbing=absorbing)
+            solver.set_initial_guess(previous["utilities"], previous["policy"])
+            iterations = solver.solve(method=method, warm_start=True)
+            algorithm = "policy_iteration"
+        else:
+            solver = ValueIteration(maze, discount, absorbing=absorbing)
+            if previous is None:
+                iterations = solver.solve(error)
+            else:
+                solver.set_initial_guess(previous["utilities"])
+                iterations = solver.refine(error, method)
+            algorithm = "value_iteration"
+
+        results.append({
+            "discount": discount,
+            "algorithm": algorithm,
+            "utilities": solver.utilities,
+            "policy": solver.policy.copy(),
+            "iterations": iterations,
+            "backups": solver.backups,
+            "time": time.perf_counter() - start_time,
+        })
+    return results
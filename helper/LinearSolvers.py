@@ -0,0 +1,206 @@
+import importlib.util
+import warnings
+import numpy as np
+
+# SciPy is optional, the pure NumPy solvers are used when it is not installed. It is only
+# imported when a SciPy solver is actually used, as importing it is slow.
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
+METHODS = ("auto", "direct", "jacobi", "gauss-seidel", "bicgstab")
+
+
+def _import_sparse():
+    """
+    Imports scipy.sparse and scipy.sparse.linalg
+
+    Returns:
+        Tuple[module, module]: The scipy.sparse and scipy.sparse.linalg modules
+    """
+    if not HAS_SCIPY:
+        raise ImportError("This solver requires scipy to be installed.")
+    from scipy import sparse
+    from scipy.sparse import linalg as sparse_linalg
+    return sparse, sparse_linalg
+
+def to_csr(columns:np.ndarray, weights:np.ndarray, discount:float):
+    """
+    Builds the SciPy CSR matrix of the policy evaluation system (I - γP)
+
+    Args:
+        columns (np.ndarray): The columns of P, of shape (n, k)
+        weights (np.ndarray): The values of P, of shape (n, k)
+        discount (float): The discount factor γ
+
+    Returns:
+        scipy.sparse.csr_matrix: The matrix (I - γP)
+    """
+    sparse, _ = _import_sparse()
+    n, k = columns.shape
+    p = sparse.csr_matrix(
+        (np.ravel(weights), np.ravel(columns), np.arange(0, n * k + 1, k)),
+        shape=(n, n),
+    )
+    return (sparse.identity(n, format="csr") - discount * p).tocsr()
+
+def _split_diagonal(columns:np.ndarray, weights:np.ndarray, rewards:np.ndarray, discount:float):
+    """
+    Moves the self-transitions of each state to the left-hand side of U = R + γPU and divides by
+    them, so that U(s) = R(s) / (1 - γP(s|s)) + ∑_{s'≠s} γP(s'|s) / (1 - γP(s|s)) U(s')
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The scaled rewards, of shape (n,), and the scaled
+            off-diagonal values of γP, of shape (n, k)
+    """
+    rows = np.arange(len(columns))[:, None]
+    self_loops = columns == rows
+    diagonal = 1 - discount * np.where(self_loops, weights, 0.0).sum(axis=1)
+    off_diagonal = discount * np.where(self_loops, 0.0, weights) / diagonal[:, None]
+    return rewards / diagonal, off_diagonal
+
+def _warn_not_converged(name:str, max_iterations:int, delta:float, tol:float):
+    warnings.warn(
+        f"{name} stopped after {max_iterations} iterations with a change of {delta:.3g}, "
+        f"above the tolerance {tol:.3g}.",
+        RuntimeWarning, stacklevel=3,
+    )
+
+def jacobi(columns:np.ndarray, weights:np.ndarray, rewards:np.ndarray, discount:float,
+           x0:np.ndarray=None, tol:float=1e-12, max_iterations:int=100000):
+    """
+    Solves U = R + γPU with Jacobi iterations, where the self-transitions of each
+    state are moved to the left-hand side: U(s) = (R(s) + γ∑_{s'≠s}P(s'|s)U(s')) / (1 - γP(s|s))
+
+    Args:
+        columns (np.ndarray): The columns of P, of shape (n, k)
+        weights (np.ndarray): The values of P, of shape (n, k)
+        rewards (np.ndarray): The rewards R, of shape (n,)
+        discount (float): The discount factor γ
+        x0 (np.ndarray): The initial guess of U, zeros if not given
+        tol (float): The maximum change of U at which the iterations terminate
+        max_iterations (int): The maximum number of iterations
+
+    Returns:
+        np.ndarray: The utilities U, of shape (n,)
+    """
+    rewards, off_diagonal = _split_diagonal(columns, weights, rewards, discount)
+
+    x = np.zeros(len(columns)) if x0 is None else np.array(x0, dtype=float)
+    delta = 0.0
+    for _ in range(max_iterations):
+        x_next = rewards + np.einsum("ij,ij->i", off_diagonal, x[columns])
+        delta = np.abs(x_next - x).max(initial=0.0)
+        x = x_next
+        if delta < tol:
+            break
+    else:
+        _warn_not_converged("Jacobi", max_iterations, delta, tol)
+    return x
+
+def gauss_seidel(columns:np.ndarray, weights:np.ndarray, rewards:np.ndarray, discount:float, colours:np.ndarray,
+                 x0:np.ndarray=None, tol:float=1e-12, max_iterations:int=100000):
+    """
+    Solves U = R + γPU with red-black Gauss-Seidel iterations. In a grid maze every transition
+    either stays in place or moves to a neighbour of the opposite colour in a checkerboard
+    colouring, so all states of one colour can be updated at once from the newest utilities of
+    the other colour.
+
+    Args:
+        columns (np.ndarray): The columns of P, of shape (n, k)
+        weights (np.ndarray): The values of P, of shape (n, k)
+        rewards (np.ndarray): The rewards R, of shape (n,)
+        discount (float): The discount factor γ
+        colours (np.ndarray): The checkerboard colour (0 or 1) of every state, of shape (n,)
+        x0 (np.ndarray): The initial guess of U, zeros if not given
+        tol (float): The maximum change of U at which the iterations terminate
+        max_iterations (int): The maximum number of iterations
+
+    Returns:
+        np.ndarray: The utilities U, of shape (n,)
+    """
+    rewards, off_diagonal = _split_diagonal(columns, weights, rewards, discount)
+    # Slice the system of each colour once, instead of on every iteration
+    groups = []
+    for colour in (0, 1):
+        group = np.flatnonzero(colours == colour)
+        groups.append((group, columns[group], off_diagonal[group], rewards[group]))
+
+    x = np.zeros(len(columns)) if x0 is None else np.array(x0, dtype=float)
+    delta = 0.0
+    for _ in range(max_iterations):
+        delta = 0.0
+        for group, group_columns, group_off_diagonal, group_rewards in groups:
+            x_group = group_rewards + np.einsum("ij,ij->i", group_off_diagonal, x[group_columns])
+            delta = max(delta, np.abs(x_group - x[group]).max(initial=0.0))
+            x[group] = x_group
+        if delta < tol:
+            break
+    else:
+        _warn_not_converged("Gauss-Seidel", max_iterations, delta, tol)
+    return x
+
+def bicgstab(columns:np.ndarray, weights:np.ndarray, rewards:np.ndarray, discount:float,
+             x0:np.ndarray=None, tol:float=1e-12):
+    """
+    Solves (I - γP)U = R with SciPy's BiCGSTAB Krylov solver, which handles the non-symmetric
+    system and can be seeded with a good initial guess
+
+    Args:
+        columns (np.ndarray): The columns of P, of shape (n, k)
+        weights (np.ndarray): The values of P, of shape (n, k)
+        rewards (np.ndarray): The rewards R, of shape (n,)
+        discount (float): The discount factor γ
+        x0 (np.ndarray): The initial guess of U
+        tol (float): The relative residual at which the iterations terminate
+
+    Returns:
+        Tuple[np.ndarray, bool]: The utilities U and whether the solver converged
+    """
+    _, sparse_linalg = _import_sparse()
+    a = to_csr(columns, weights, discount)
+    try:
+        x, info = sparse_linalg.bicgstab(a, rewards, x0=x0, rtol=tol, atol=0.0)
+    except TypeError:
+        # SciPy < 1.12 names the relative tolerance `tol`
+        x, info = sparse_linalg.bicgstab(a, rewards, x0=x0, tol=tol, atol=0.0)
+    return x, info == 0
+
+def solve_policy_system(columns:np.ndarray, weights:np.ndarray, rewards:np.ndarray, discount:float,
+                        method:str="auto", x0:np.ndarray=None, tol:float=1e-12, colours:np.ndarray=None):
+    """
+    Solves the policy evaluation system (I - γP)U = R
+
+    Args:
+        columns (np.ndarray): The columns of P, of shape (n, k)
+        weights (np.ndarray): The values of P, of shape (n, k)
+        rewards (np.ndarray): The rewards R, of shape (n,)
+        discount (float): The discount factor γ
+        method (str): "direct" for a SciPy sparse direct solve, "bicgstab" for a SciPy Krylov solve,
+            "jacobi" or "gauss-seidel" for the pure NumPy iterative solvers, or "auto" to use the
+            direct solver when SciPy is installed
+        x0 (np.ndarray): The initial guess of U for iterative methods
+        tol (float): The tolerance of iterative methods
+        colours (np.ndarray): The checkerboard colour of every state, required by "gauss-seidel"
+
+    Returns:
+        np.ndarray: The utilities U, of shape (n,)
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}.")
+    if method == "auto":
+        method = "direct" if HAS_SCIPY else "jacobi"
+    if method == "direct":
+        _, sparse_linalg = _import_sparse()
+        if len(rewards) == 0:
+            return np.zeros(0)
+        return sparse_linalg.spsolve(to_csr(columns, weights, discount).tocsc(), rewards)
+    if method == "bicgstab":
+        x, converged = bicgstab(columns, weights, rewards, discount, x0=x0, tol=tol)
+        if converged or colours is None:
+            return x
+        # Finish off with Gauss-Seidel if the Krylov solver stalled
+        method, x0 = "gauss-seidel", x
+    if method == "gauss-seidel":
+        if colours is None:
+            raise ValueError("The gauss-seidel solver requires the colours of the states.")
+        return gauss_seidel(columns, weights, rewards, discount, colours, x0=x0, tol=tol)
+    return jacobi(columns, weights, rewards, discount, x0=x0, tol=tol)
@@ -0,0 +1,106 @@
+from typing import Dict, List, Tuple, Union
+import json
+import os
+import tempfile
+import numpy as np
+from classes.States import State
+from classes.Maze import Maze
+
+# Version of the on-disk format, stored in maze.json
+FORMAT_VERSION = 1
+# Names of the arrays of a maze and of a solution, stored as <name>.npy
+MAZE_ARRAYS = ("rewards", "walls", "terminals")
+SOLUTION_ARRAYS = ("utilities", "policy")
+
+
+def _to_json(value):
+    """
+    Converts the NumPy scalars and arrays in metadata to plain Python values
+    """
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _write_json(path:str, data:Dict):
+    # Write to a unique temporary file first, so that concurrent readers never see a partial file,
+    # even if several processes write the same file at once
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, default=_to_json, indent=2)
+    os.replace(tmp_path, path)
+
+def _read_json(path:str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+def save_maze(directory:str, layout:Union[List[List[State]], Maze], **metadata):
+    """
+    Writes a maze to a directory as rewards.npy (float64), walls.npy and terminals.npy (uint8),
+    together with maze.json holding its shape and metadata. The directory can also be solved
+    directly by TiledValueIteration, which writes its utilities, policy and solution.json in the
+    format of save_solution.
+
+    Args:
+        directory (str): The directory to write to, created if needed
+        layout (Union[List[List[State]], Maze]): The maze layout
+        **metadata: JSON-serializable metadata of the maze, e.g. discount=0.99 or seed=3
+    """
+    maze = Maze.from_layout(layout)
+    os.makedirs(directory, exist_ok=True)
+    for name in MAZE_ARRAYS:
+        np.save(os.path.join(directory, f"{name}.npy"), getattr(maze, name))
+    _write_json(os.path.join(directory, "maze.json"), {"format": FORMAT_VERSION, "shape": list(maze.shape), "metadata": metadata})
+
+def load_maze(directory:str, mmap_mode:str="r") -> Tuple[Maze, Dict]:
+    """
+    Reads a maze written by save_maze. By default the arrays are memory-mapped read-only, so even
+    large mazes open instantly and their pages are shared between processes reading the same files.
+
+    Args:
+        directory (str): The directory of the maze
+        mmap_mode (str): The memory-map mode of the arrays, see np.load, or None to read them into memory
+
+    Returns:
+        Tuple[Maze, Dict]: The maze and its metadata
+    """
+    header = _read_json(os.path.join(directory, "maze.json"))
+    if header.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported maze format {header.get('format')!r} in {directory}, expected {FORMAT_VERSION}.")
+    arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in MAZE_ARRAYS}
+    return Maze(**arrays), header["metadata"]
+
+def save_solution(directory:str, result:Dict):
+    """
+    Writes the solution of a maze to its directory as utilities.npy and policy.npy (int8 action
+    codes), together with solution.json holding the remaining entries of the result
+
+    Args:
+        directory (str): The directory to write to, typically that of the maze
+        result (Dict): The "utilities" and "policy" of the solution and any JSON-serializable
+            convergence stats, e.g. a result of helper.BatchSolver.solve_batch or SolveCache.solve
+    """
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "utilities.npy"), np.asarray(result["utilities"]))
+    np.save(os.path.join(directory, "policy.npy"), np.asarray(result["policy"], dtype=np.int8))
+    stats = {key: value for key, value in result.items() if key not in SOLUTION_ARRAYS}
+    _write_json(os.path.join(directory, "solution.json"), stats)
+
+def load_solution(directory:str, mmap_mode:str="r") -> Dict:
+    """
+    Reads a solution written by save_solution, memory-mapping the arrays read-only by default
+
+    Args:
+        directory (str): The directory of the solution
+        mmap_mode (str): The memory-map mode of the arrays, see np.load, or None to read them into memory
+
+    Returns:
+        Dict: The "utilities", "policy" and convergence stats of the solution, or None if the
+            directory holds no solution
+    """
+    path = os.path.join(directory, "solution.json")
+    if not os.path.exists(path):
+        return None
+    result = _read_json(path)
+    for name in SOLUTION_ARRAYS:
+        result[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+    return result
@@ -1,6 +1,7 @@
 from typing import Tuple
 import numpy as np
 from classes.States import State
+from classes.Maze import Maze
 
 pos = State(reward=1, is_terminal=True)
 neg = State(reward=-1, is_terminal=True)
@@ -17,5 +18,28 @@ def get_q1_maze():
         [reg, reg, reg, reg, reg, reg]
     ]
 
-def generate_random_maze(size:Tuple[int, int]):
-    return np.random.choice([pos, neg, reg, wal], size=size, p=[0.1, 0.1, 0.7, 0.1])
\ No newline at end of file
+def generate_random_maze(size:Tuple[int, int], seed:int=None):
+    rng = np.random if seed is None else np.random.default_rng(seed)
+    return rng.choice([pos, neg, reg, wal], size=size, p=[0.1, 0.1, 0.7, 0.1])
+
+def generate_random_array_maze(size:Tuple[int, int], wall_density:float=0.1, terminal_density:float=0.2, seed:int=None):
+    """
+    Generates a random maze directly as arrays, which is much faster than generate_random_maze for large mazes.
+    Half of the terminal states are positive (+1) and half are negative (-1), as in generate_random_maze.
+
+    Args:
+        size (Tuple[int, int]): The height and width of the maze
+        wall_density (float): The probability of a state being a wall
+        terminal_density (float): The probability of a state being terminal
+        seed (int): The seed of the random number generator
+
+    Returns:
+        Maze: The maze
+    """
+    rng = np.random.default_rng(seed)
+    kind = rng.choice(4, size=size, p=[terminal_density / 2, terminal_density / 2, 1 - terminal_density - wall_density, wall_density])
+    return Maze(
+        rewards=np.choose(kind, [pos.reward, neg.reward, reg.reward, wal.reward]),
+        walls=kind == 3,
+        terminals=kind < 2,
+    )
\ No newline at end of file
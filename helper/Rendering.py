@@ -0,0 +1,167 @@
+from typing import List, Union
+import struct
+import zlib
+import numpy as np
+from classes.States import State
+from classes.Maze import Maze
+from classes.Direction import Direction
+
+# Colours of the cells, matching GridWorldPlotter
+WALL_COLOUR = "#808080"
+EMPTY_COLOUR = "#FFFFFF"
+POSITIVE_COLOUR = "#46E950"
+NEGATIVE_COLOUR = "#FE922B"
+LINE_COLOUR = "#000000"
+# Cells smaller than this (in pixels) are drawn without grid lines
+MIN_LINE_CELL_SIZE = 4
+# Cells smaller than this (in pixels) are too small for a readable arrow, so their action is drawn
+# as a tint of one colour per action code (left, up, right, down) instead
+MIN_ARROW_CELL_SIZE = 7
+ACTION_COLOURS = ("#1F77B4", "#9467BD", "#D62728", "#17BECF")
+
+
+def hex_to_rgb(colour:str) -> np.ndarray:
+    return np.array([int(colour[i:i+2], 16) for i in (1, 3, 5)], dtype=np.uint8)
+
+def _upscale(cells:np.ndarray, cell_size:int) -> np.ndarray:
+    """
+    Turns an array with one value per cell into an image with a square of cell_size pixels per cell
+    """
+    return np.repeat(np.repeat(cells, cell_size, axis=0), cell_size, axis=1)
+
+def _draw_grid_lines(image:np.ndarray, cell_size:int):
+    if cell_size < MIN_LINE_CELL_SIZE:
+        return
+    colour = hex_to_rgb(LINE_COLOUR)
+    image[::cell_size] = colour
+    image[:, ::cell_size] = colour
+    image[-1] = colour
+    image[:, -1] = colour
+
+def _get_arrow_glyphs(cell_size:int) -> np.ndarray:
+    """
+    Draws an arrow in every direction
+
+    Returns:
+        np.ndarray: Boolean masks of shape (4, cell_size, cell_size), indexed by action code
+    """
+    y, x = (np.mgrid[0:cell_size, 0:cell_size] + 0.5) / cell_size
+    head = (y >= 0.2) & (y <= 0.5) & (np.abs(x - 0.5) <= y - 0.2)
+    shaft = (y >= 0.45) & (y <= 0.8) & (np.abs(x - 0.5) <= max(0.07, 0.5 / cell_size))
+    up = head | shaft
+    # Rotating the up arrow anticlockwise by 90 degrees gives the left arrow, and so on
+    glyphs = {Direction.UP.index: up, Direction.LEFT.index: np.rot90(up, 1),
+              Direction.DOWN.index: np.rot90(up, 2), Direction.RIGHT.index: np.rot90(up, 3)}
+    return np.stack([glyphs[a] for a in range(len(Direction.ACTIONS))])
+
+def render_maze(layout:Union[List[List[State]], Maze], cell_size:int) -> np.ndarray:
+    """
+    Rasterizes the walls and rewards of a maze
+
+    Args:
+        layout (Union[List[List[State]], Maze]): The maze layout
+        cell_size (int): The height and width of every cell in pixels
+
+    Returns:
+        np.ndarray: The RGB image, uint8 of shape (height * cell_size, width * cell_size, 3)
+    """
+    maze = Maze.from_layout(layout)
+    cells = np.empty(maze.shape + (3,), dtype=np.uint8)
+    cells[...] = hex_to_rgb(EMPTY_COLOUR)
+    cells[maze.rewards > 0] = hex_to_rgb(POSITIVE_COLOUR)
+    cells[maze.rewards <= -1] = hex_to_rgb(NEGATIVE_COLOUR)
+    cells[maze.walls.view(bool)] = hex_to_rgb(WALL_COLOUR)
+    image = _upscale(cells, cell_size)
+    _draw_grid_lines(image, cell_size)
+    return image
+
+def render_utilities(layout:Union[List[List[State]], Maze], utilities:np.ndarray, cell_size:int) -> np.ndarray:
+    """
+    Rasterizes the utilities of a maze as a heatmap, from the lowest utility in orange through
+    white to the highest utility in green
+
+    Args:
+        layout (Union[List[List[State]], Maze]): The maze layout
+        utilities (np.ndarray): The utility of every state
+        cell_size (int): The height and width of every cell in pixels
+
+    Returns:
+        np.ndarray: The RGB image, uint8 of shape (height * cell_size, width * cell_size, 3)
+    """
+    maze = Maze.from_layout(layout)
+    walls = maze.walls.view(bool)
+    utilities = np.asarray(utilities, dtype=np.float64)
+    live_utilities = utilities[~walls]
+    low, high = (live_utilities.min(), live_utilities.max()) if live_utilities.size else (0.0, 0.0)
+    # Position of every utility on the colour scale, from -1 (lowest) to 1 (highest)
+    scale = 2 * (utilities - low) / (high - low) - 1 if high > low else np.zeros_like(utilities)
+
+    empty = hex_to_rgb(EMPTY_COLOUR).astype(np.float64)
+    end = np.where(scale[..., None] < 0, hex_to_rgb(NEGATIVE_COLOUR), hex_to_rgb(POSITIVE_COLOUR))
+    cells = (empty + np.abs(scale)[..., None] * (end - empty)).round().astype(np.uint8)
+    cells[walls] = hex_to_rgb(WALL_COLOUR)
+    image = _upscale(cells, cell_size)
+    _draw_grid_lines(image, cell_size)
+    return image
+
+def render_policy(layout:Union[List[List[State]], Maze], policy:np.ndarray, cell_size:int, utilities:np.ndarray=None) -> np.ndarray:
+    """
+    Rasterizes the policy of a maze as arrows, over the utility heatmap if utilities are given
+    or over the rewards of the maze otherwise. Cells smaller than MIN_ARROW_CELL_SIZE are tinted
+    with the ACTION_COLOURS of their actions instead.
+
+    Args:
+        layout (Union[List[List[State]], Maze]): The maze layout
+        policy (np.ndarray): The action code of every state
+        cell_size (int): The height and width of every cell in pixels
+        utilities (np.ndarray): The utility of every state
+
+    Returns:
+        np.ndarray: The RGB image, uint8 of shape (height * cell_size, width * cell_size, 3)
+    """
+    maze = Maze.from_layout(layout)
+    image = render_maze(maze, cell_size) if utilities is None else render_utilities(maze, utilities, cell_size)
+    policy = np.asarray(policy, dtype=np.intp)
+    if cell_size < MIN_ARROW_CELL_SIZE:
+        # Blend every live cell halfway towards the colour of its action
+        colours = np.stack([hex_to_rgb(colour) for colour in ACTION_COLOURS])
+        live = _upscale(~maze.walls.view(bool), cell_size)
+        tint = _upscale(colours[policy], cell_size)
+        image[live] = (image[live].astype(np.uint16) + tint[live]) // 2
+        return image
+
+    # glyphs[policy] has shape (height, width, cell_size, cell_size), interleave it into the image
+    arrows = _get_arrow_glyphs(cell_size)[policy]
+    arrows[maze.walls.view(bool)] = False
+    arrows = arrows.transpose(0, 2, 1, 3).reshape(image.shape[:2])
+    image[arrows] = hex_to_rgb(LINE_COLOUR)
+    return image
+
+def to_ppm(image:np.ndarray) -> bytes:
+    """
+    Encodes an RGB image as a binary PPM, which Tk can load without any image library
+    """
+    height, width, _ = image.shape
+    return b"P6 %d %d 255\n" % (width, height) + np.ascontiguousarray(image, dtype=np.uint8).tobytes()
+
+def to_png(image:np.ndarray) -> bytes:
+    """
+    Encodes an RGB image as a PNG with zlib, without any image library
+    """
+    height, width, _ = image.shape
+    # Every scanline starts with its filter type, 0 (none)
+    scanlines = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, -1)
+
+    def chunk(tag:bytes, data:bytes):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)) + chunk(b"IEND", b"")
+
+def save_png(path:str, image:np.ndarray):
+    """
+    Writes an RGB image, e.g. from render_maze, render_utilities or render_policy, to a PNG file
+    """
+    with open(path, "wb") as f:
+        f.write(to_png(image))
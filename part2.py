@@ -1,6 +1,7 @@
 import tkinter as tk
 from classes.MDP import ValueIteration, PolicyIteration, ModifiedPolicyIteration
-from classes.Plotters import GridWorldPlotter, ComplexityPlotter
+from classes.Plotters import ComplexityPlotter
+from classes.GridWorldPlotter import GridWorldPlotter
 from helper.MazeLayouts import generate_random_maze
 
 if __name__ == "__main__":